@@ -0,0 +1,106 @@
+# pylint: skip-file
+import glob
+import os
+import time
+import json
+
+from tqdm import tqdm
+from diplomacy import Game
+
+from benchutils.statstream import StatStream
+from benchutils.report import print_stat_streams
+
+from dgame.board.board import Board
+from dgame.board.definition import BoardDefinitionFile
+from dgame.board.adjudicator import resolve_movement
+from dgame.executor import parse_order
+from dgame.power import Player
+
+setup_time = StatStream(5)
+legacy_time = StatStream(5)
+resolve_time = StatStream(5)
+apply_time = StatStream(5)
+
+
+def replay_game(json_game, board):
+    """ Replays a game with the legacy engine and adjudicates every movement phase with the native resolver """
+    game = Game(map_name=json_game.get('map', 'standard'), rules=json_game.get('rules', []))
+
+    for phase in json_game['phases']:
+        movement = phase['name'][-1] == 'M'
+
+        if movement:
+            s = time.time()
+            board.from_game_state(game)
+
+            orders = {}
+            for power_name, power_orders in phase['orders'].items():
+                player = board.get_player(power_name)
+                orders[player] = [parse_order(order, board) for order in power_orders or []]
+
+            setup_time.update(time.time() - s)
+
+            s = time.time()
+            resolution = resolve_movement(board, orders)
+            resolve_time.update(time.time() - s)
+
+            s = time.time()
+            board.apply_resolution(resolution)
+            apply_time.update(time.time() - s)
+
+        for power_name, power_orders in phase['orders'].items():
+            if not power_orders:
+                continue
+
+            if phase['name'][-1] == 'R':
+                power_orders = [order.replace(' - ', ' R ') for order in power_orders]
+
+            power_orders = [order for order in power_orders if order != 'WAIVE']
+            game.set_orders(power_name, power_orders, expand=False)
+
+        s = time.time()
+        game.process()
+
+        if movement:
+            legacy_time.update(time.time() - s)
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    sys.stderr = sys.stdout
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--data', default='/home/user1/diplomacy/diplomacy/tests/network', type=str,
+        help='folder of saved games to replay')
+
+    parser.add_argument('--map', default='/home/user1/diplomacy/diplomacy/maps/standard.map', type=str,
+        help='map definition file')
+
+    parser.add_argument('-n', default=10, type=int,
+        help='Number of times the games are replayed')
+
+    args = parser.parse_args()
+
+    definition = BoardDefinitionFile(args.map)
+    board = Board(definition, [Player(p) for p in definition.initial_condition()])
+
+    games = []
+    for file_name in sorted(glob.glob(os.path.join(args.data, '*.json'))):
+        with open(file_name, 'r') as game_file:
+            games.append(json.load(game_file))
+
+    for _ in tqdm(range(args.n)):
+        for json_game in games:
+            replay_game(json_game, board)
+
+    print('Report:')
+    print_stat_streams(
+        ['Setup', 'Legacy', 'Resolve', 'Apply'],
+        [setup_time, legacy_time, resolve_time, apply_time],
+        file_name='data/profile_adjudicator.csv'
+    )
+    print('Done')
+    sys.exit(0)
@@ -0,0 +1,92 @@
+# pylint: skip-file
+import glob
+import os
+import time
+import json
+
+from tqdm import tqdm
+from diplomacy import Game
+
+from benchutils.statstream import StatStream
+from benchutils.report import print_stat_streams
+
+from dgame.board.board import Board
+from dgame.board.definition import BoardDefinitionFile
+from dgame.board.unit import get_all_possible_move_orders
+from dgame.board.vectorized import get_all_possible_move_order_codes
+from dgame.power import Player
+
+object_time = StatStream(5)
+codes_time = StatStream(5)
+
+
+def replay_game(json_game, board):
+    """ Replays a game with the legacy engine and generates the possible orders of every movement phase
+        with the object and the array engines """
+    game = Game(map_name=json_game.get('map', 'standard'), rules=json_game.get('rules', []))
+
+    for phase in json_game['phases']:
+        if phase['name'][-1] == 'M':
+            board.from_game_state(game)
+
+            s = time.time()
+            board.clear_cache()
+            get_all_possible_move_orders(board)
+            object_time.update(time.time() - s)
+
+            s = time.time()
+            get_all_possible_move_order_codes(board)
+            codes_time.update(time.time() - s)
+
+        for power_name, power_orders in phase['orders'].items():
+            if not power_orders:
+                continue
+
+            if phase['name'][-1] == 'R':
+                power_orders = [order.replace(' - ', ' R ') for order in power_orders]
+
+            power_orders = [order for order in power_orders if order != 'WAIVE']
+            game.set_orders(power_name, power_orders, expand=False)
+
+        game.process()
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    sys.stderr = sys.stdout
+
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument('--data', default='/home/user1/diplomacy/diplomacy/tests/network', type=str,
+        help='folder of saved games to replay')
+
+    parser.add_argument('--map', default='/home/user1/diplomacy/diplomacy/maps/standard.map', type=str,
+        help='map definition file')
+
+    parser.add_argument('-n', default=10, type=int,
+        help='Number of times the games are replayed')
+
+    args = parser.parse_args()
+
+    definition = BoardDefinitionFile(args.map)
+    board = Board(definition, [Player(p) for p in definition.initial_condition()])
+
+    games = []
+    for file_name in sorted(glob.glob(os.path.join(args.data, '*.json'))):
+        with open(file_name, 'r') as game_file:
+            games.append(json.load(game_file))
+
+    for _ in tqdm(range(args.n)):
+        for json_game in games:
+            replay_game(json_game, board)
+
+    print('Report:')
+    print_stat_streams(
+        ['Objects', 'Codes'],
+        [object_time, codes_time],
+        file_name='data/profile_order_codes.csv'
+    )
+    print('Done')
+    sys.exit(0)
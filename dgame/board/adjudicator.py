@@ -0,0 +1,428 @@
+"""
+    Movement phase adjudicator.
+
+    Every order is a decision (does the move succeed, is the support given, is the convoying fleet still there)
+    that is resolved recursively over province ids. Decisions that depend on each other are resolved by
+    guessing (see L.B Kruijswijk, The Math of Adjudication); if both guesses are consistent the cycle
+    is circular movement and all moves succeed, if the cycle goes through a convoy we apply the Szykman rule.
+
+    http://web.inter.nl.net/users/L.B.Kruijswijk/
+"""
+from dgame.order import Order
+from dgame.order import HOLD, MOVE, CONVOY, CONVOY_MOVE, SUPPORT_MOVE, SUPPORT
+
+from collections import defaultdict
+from typing import Dict, Iterable, List, Set, Tuple
+
+UNRESOLVED = 0
+GUESSING = 1
+RESOLVED = 2
+
+
+class Resolution:
+    """
+        Result of a movement phase
+
+        placement: {province id: (unit, loc)} where every unit that was not dislodged ends up
+        dislodged: {province id: (unit, province id the attack came from or -1 if the attacker was convoyed)}
+        contested: provinces that were left empty because of a standoff
+        succeeded: {order: bool} result of every order, i.e move succeeded, support was not cut
+    """
+    __slots__ = ('placement', 'dislodged', 'contested', 'succeeded')
+
+    def __init__(self, placement, dislodged, contested, succeeded):
+        self.placement = placement  # type: Dict[int, Tuple[Unit, Province]]
+        self.dislodged = dislodged  # type: Dict[int, Tuple[Unit, int]]
+        self.contested = contested  # type: Set[int]
+        self.succeeded = succeeded  # type: Dict[Order, bool]
+
+    def moves(self) -> Dict[int, Tuple['Unit', 'Province']]:
+        """ units that changed province """
+        return {
+            pid: (unit, loc) for pid, (unit, loc) in self.placement.items() if unit.loc.without_coast.id != pid
+        }
+
+
+class MovementResolver:
+    """ Resolve the movement phase of a board given the orders of every power.
+        Units without orders hold """
+
+    def __init__(self, board: 'Board', orders_by_power: Dict['Player', Iterable[Order]]):
+        self.board = board
+        self.adjacency = board.map_index.adjacency
+
+        state = board.state
+        units = state.units
+        owners = state.owner
+
+        self.orders = []    # type: List[Order]
+        self.kind = []
+        self.src = []       # province id of the unit giving the order
+        self.dest = []      # province id of the destination (move) or of the supported move destination
+        self.coast = []     # province id of the destination with its coast
+        self.target = []    # province id of the unit supported/convoyed
+        self.power = []     # owner id of the unit giving the order
+        self.order_at = {}  # province id => order index
+
+        given = {}
+        for orders in orders_by_power.values():
+            for order in orders:
+                given[order.unit.loc.without_coast.id] = order
+
+        for pid in state.occupied():
+            pid = int(pid)
+            order = given.get(pid)
+
+            if order is None:
+                order = Order(order=HOLD, unit=units[pid], dest=None, target=None, path=None)
+
+            kind = order.order
+            dest = order.dest.without_coast.id if order.dest is not None else -1
+
+            # army move to a non adjacent province is a convoy
+            if kind is MOVE and dest not in self.adjacency[pid]:
+                kind = CONVOY_MOVE
+
+            self.order_at[pid] = len(self.orders)
+            self.orders.append(order)
+            self.kind.append(kind)
+            self.src.append(pid)
+            self.dest.append(dest)
+            self.coast.append(order.dest.id if order.dest is not None else -1)
+            self.target.append(order.target.loc.without_coast.id if order.target is not None else -1)
+            self.power.append(int(owners[pid]))
+
+        n = len(self.orders)
+        self.result = [False] * n
+        self.state = [UNRESOLVED] * n
+        self.dependencies = []
+
+        # moves to a given province, supports given to an order, fleets convoying an army
+        self.moves_into = defaultdict(list)
+        self.supports = [[] for _ in range(n)]
+        self.convoys = [set() for _ in range(n)]
+        self.convoyed = [-1] * n
+
+        # convoyed moves that fails because of the Szykman rule
+        self.paradox = set()
+
+        self._match_orders()
+
+    def _is_move(self, i: int) -> bool:
+        kind = self.kind[i]
+        return kind is MOVE or kind is CONVOY_MOVE
+
+    def _match_orders(self):
+        """ link supports and convoys to the orders they are for; unmatched orders are void """
+        for i, kind in enumerate(self.kind):
+            if kind is MOVE or kind is CONVOY_MOVE:
+                self.moves_into[self.dest[i]].append(i)
+
+        for i, kind in enumerate(self.kind):
+            j = self.order_at.get(self.target[i])
+
+            if j is None:
+                continue
+
+            if kind is SUPPORT and not self._is_move(j):
+                self.supports[j].append(i)
+
+            elif kind is SUPPORT_MOVE and self._is_move(j) and self.dest[j] == self.dest[i]:
+                # supporting a move to a different coast is void
+                if self.coast[i] == self.dest[i] or self.coast[i] == self.coast[j]:
+                    self.supports[j].append(i)
+
+            elif kind is CONVOY and self.kind[j] is CONVOY_MOVE and self.dest[j] == self.dest[i]:
+                self.convoys[j].add(self.src[i])
+                self.convoyed[i] = j
+
+        # the convoy orders cannot form a path, the army takes the land route if there is one
+        for i, kind in enumerate(self.kind):
+            if kind is CONVOY_MOVE and self.dest[i] in self.adjacency[self.src[i]] and not self._path(i, False):
+                self.kind[i] = MOVE
+
+    # Strengths
+    # ---------
+    def _head_to_head(self, i: int) -> int:
+        """ return the move going in the opposite direction of `i` if any (convoyed moves are never head to head) """
+        if self.kind[i] is not MOVE:
+            return -1
+
+        j = self.order_at.get(self.dest[i])
+        if j is not None and self.kind[j] is MOVE and self.dest[j] == self.src[i]:
+            return j
+
+        return -1
+
+    def _support_count(self, i: int, excluded_power: int = -1) -> int:
+        count = 0
+        for s in self.supports[i]:
+            if self.power[s] != excluded_power and self.resolve(s):
+                count += 1
+        return count
+
+    def _attack_strength(self, i: int) -> int:
+        if self.kind[i] is CONVOY_MOVE and not self._path(i):
+            return 0
+
+        j = self.order_at.get(self.dest[i])
+
+        if j is None or (self._is_move(j) and self._head_to_head(i) != j and self.resolve(j)):
+            return 1 + self._support_count(i)
+
+        # cannot dislodge your own unit
+        if self.power[j] == self.power[i]:
+            return 0
+
+        # supports from the power being attacked do not count
+        return 1 + self._support_count(i, self.power[j])
+
+    def _hold_strength(self, pid: int) -> int:
+        j = self.order_at.get(pid)
+
+        if j is None:
+            return 0
+
+        if self._is_move(j):
+            return 0 if self.resolve(j) else 1
+
+        return 1 + self._support_count(j)
+
+    def _defend_strength(self, i: int) -> int:
+        return 1 + self._support_count(i)
+
+    def _prevent_strength(self, i: int) -> int:
+        if self.kind[i] is CONVOY_MOVE and not self._path(i):
+            return 0
+
+        j = self._head_to_head(i)
+        if j >= 0 and self.resolve(j):
+            return 0
+
+        return 1 + self._support_count(i)
+
+    def _path(self, i: int, resolve: bool = True) -> bool:
+        """ is there a chain of convoying fleets still in place going from the army to its destination
+            if `resolve` is false we only check the fleets were ordered to form a chain """
+        if i in self.paradox:
+            return False
+
+        fleets = self.convoys[i]
+        if not fleets:
+            return False
+
+        adjacency = self.adjacency
+        order_at = self.order_at
+        dest = self.dest[i]
+
+        seen = set()
+        stack = [self.src[i]]
+
+        while stack:
+            loc = stack.pop()
+
+            for n in adjacency[loc]:
+                if n in fleets and n not in seen:
+                    seen.add(n)
+
+                    if not resolve or self.resolve(order_at[n]):
+                        if dest in adjacency[n]:
+                            return True
+
+                        stack.append(n)
+
+        return False
+
+    # Decisions
+    # ---------
+    def _adjudicate(self, i: int) -> bool:
+        kind = self.kind[i]
+
+        if kind is MOVE or kind is CONVOY_MOVE:
+            return self._adjudicate_move(i)
+
+        if kind is SUPPORT or kind is SUPPORT_MOVE:
+            return self._adjudicate_support(i)
+
+        if kind is CONVOY:
+            return self._adjudicate_convoy(i)
+
+        return True
+
+    def _adjudicate_move(self, i: int) -> bool:
+        attack = self._attack_strength(i)
+
+        if attack == 0:
+            return False
+
+        j = self._head_to_head(i)
+        if j >= 0:
+            if attack <= self._defend_strength(j):
+                return False
+
+        elif attack <= self._hold_strength(self.dest[i]):
+            return False
+
+        for o in self.moves_into[self.dest[i]]:
+            if o != i and attack <= self._prevent_strength(o):
+                return False
+
+        return True
+
+    def _adjudicate_support(self, i: int) -> bool:
+        """ is the support given; i.e not cut and not dislodged """
+        pid = self.src[i]
+        # province the support is directed against
+        against = self.dest[i] if self.kind[i] is SUPPORT_MOVE else -1
+
+        for m in self.moves_into[pid]:
+            if self.power[m] == self.power[i]:
+                continue
+
+            if self.src[m] == against:
+                # an attack from the province we support against only cuts if it dislodges us
+                if self.resolve(m):
+                    return False
+                continue
+
+            if self.kind[m] is CONVOY_MOVE and not self._path(m):
+                continue
+
+            return False
+
+        return True
+
+    def _adjudicate_convoy(self, i: int) -> bool:
+        """ a convoying fleet is still there if it is not dislodged """
+        for m in self.moves_into[self.src[i]]:
+            if self.resolve(m):
+                return False
+
+        return True
+
+    def resolve(self, i: int) -> bool:
+        state = self.state
+
+        if state[i] == RESOLVED:
+            return self.result[i]
+
+        dependencies = self.dependencies
+        if state[i] == GUESSING:
+            if i not in dependencies:
+                dependencies.append(i)
+            return self.result[i]
+
+        old_count = len(dependencies)
+
+        # first guess
+        self.result[i] = False
+        state[i] = GUESSING
+        first = self._adjudicate(i)
+
+        # no cycle
+        if len(dependencies) == old_count:
+            if state[i] != RESOLVED:
+                self.result[i] = first
+                state[i] = RESOLVED
+            return first
+
+        # we are part of a cycle but not the first decision in it
+        if dependencies[old_count] != i:
+            dependencies.append(i)
+            self.result[i] = first
+            return first
+
+        # start of a cycle try the other guess
+        self._reset(old_count)
+        self.result[i] = True
+        state[i] = GUESSING
+        second = self._adjudicate(i)
+
+        if first == second:
+            # only one consistent outcome
+            self._reset(old_count)
+            self.result[i] = first
+            state[i] = RESOLVED
+            return first
+
+        # both outcomes are consistent (circular movement) or none are (paradox)
+        self._backup_rule(old_count)
+        return self.resolve(i)
+
+    def _reset(self, old_count: int):
+        for d in self.dependencies[old_count:]:
+            self.state[d] = UNRESOLVED
+        del self.dependencies[old_count:]
+
+    def _backup_rule(self, old_count: int):
+        cycle = self.dependencies[old_count:]
+        del self.dependencies[old_count:]
+
+        convoys = [d for d in cycle if self.kind[d] is CONVOY]
+
+        if convoys:
+            # Szykman rule: the convoyed armies involved in the paradox do not move
+            for d in cycle:
+                if self.kind[d] is CONVOY_MOVE:
+                    self.paradox.add(d)
+
+            for d in convoys:
+                if self.convoyed[d] >= 0:
+                    self.paradox.add(self.convoyed[d])
+
+            for d in cycle:
+                self.state[d] = UNRESOLVED
+            return
+
+        # circular movement, every move succeeds
+        for d in cycle:
+            if self._is_move(d):
+                self.result[d] = True
+                self.state[d] = RESOLVED
+            else:
+                self.state[d] = UNRESOLVED
+
+    def run(self) -> Resolution:
+        n = len(self.orders)
+        for i in range(n):
+            self.resolve(i)
+
+        units = self.board.state.units
+        placement = {}
+        dislodged = {}
+        contested = set()
+        succeeded = {}
+
+        # successful moves into every province
+        winner = {}
+        for i in range(n):
+            succeeded[self.orders[i]] = self.result[i]
+
+            if self._is_move(i) and self.result[i]:
+                winner[self.dest[i]] = i
+
+        for i in range(n):
+            src = self.src[i]
+            unit = units[src]
+
+            if self._is_move(i) and self.result[i]:
+                placement[self.dest[i]] = (unit, self.orders[i].dest)
+                continue
+
+            attacker = winner.get(src)
+            if attacker is not None:
+                # a unit dislodged by a convoyed army can retreat to the province the army came from
+                dislodged[src] = (unit, self.src[attacker] if self.kind[attacker] != CONVOY_MOVE else -1)
+            else:
+                placement[src] = (unit, unit.loc)
+
+        for dest, moves in self.moves_into.items():
+            if dest not in winner and len(moves) > 1 and dest not in placement:
+                contested.add(dest)
+
+        return Resolution(placement, dislodged, contested, succeeded)
+
+
+def resolve_movement(board: 'Board', orders_by_power: Dict['Player', Iterable[Order]]) -> Resolution:
+    """ Adjudicate a movement phase, the board is not modified """
+    return MovementResolver(board, orders_by_power).run()
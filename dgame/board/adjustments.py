@@ -0,0 +1,114 @@
+"""
+    Adjustment phase (winter) orders.
+
+    A power with more supply centers than units can build one unit per free home center (owned and not occupied)
+    up to the difference, the builds it does not use are waived.
+    A power with more units than supply centers has to disband the difference.
+"""
+from dgame.order import Order, build, disband, waive
+from dgame.board.unit import make_unit
+
+from itertools import combinations, product
+from typing import Dict, Iterator, List, Set, Tuple
+
+
+class PowerAdjustments:
+    """
+        Adjustment choices of a power
+
+        balance : number of units the power can build (> 0) or has to disband (< 0)
+        builds  : {province: (build orders, ...)} one entry per free home center, fleets are built on every coast
+        disbands: disband orders of all the units of the power when it has to disband
+    """
+    __slots__ = ('player', 'balance', 'builds', 'disbands')
+
+    def __init__(self, player, balance: int, builds: Dict['Province', Tuple[Order, ...]], disbands: List[Order]):
+        self.player = player
+        self.balance = balance
+        self.builds = builds
+        self.disbands = disbands
+
+    def orders(self) -> Set[Order]:
+        """ every order the power can give """
+        orders = set(self.disbands)
+
+        # a power without free home center has nothing to order, not even a waive
+        if self.balance > 0 and self.builds:
+            orders.add(waive())
+
+            for options in self.builds.values():
+                orders.update(options)
+
+        return orders
+
+    def count(self) -> int:
+        """ number of different sets of orders the power can give, without enumerating them """
+        if self.balance < 0:
+            return _binomial(len(self.disbands), -self.balance)
+
+        if self.balance == 0:
+            return 1
+
+        # elementary symmetric polynomials of the number of options per province;
+        # e[j] is the number of ways to build exactly j units
+        e = [1] + [0] * self.balance
+        for options in self.builds.values():
+            n = len(options)
+
+            for j in range(self.balance, 0, -1):
+                e[j] += e[j - 1] * n
+
+        return sum(e)
+
+    def combinations(self) -> Iterator[Tuple[Order, ...]]:
+        """ lazily enumerate every set of orders, the builds that are not listed are waived """
+        if self.balance < 0:
+            yield from combinations(self.disbands, -self.balance)
+            return
+
+        provinces = list(self.builds.values())
+
+        for count in range(min(self.balance, len(provinces)), -1, -1):
+            for chosen in combinations(provinces, count):
+                yield from product(*chosen)
+
+
+def _binomial(n: int, k: int) -> int:
+    if k < 0 or k > n:
+        return 0
+
+    result = 1
+    for i in range(min(k, n - k)):
+        result = result * (n - i) // (i + 1)
+
+    return result
+
+
+def get_power_adjustments(board, player) -> PowerAdjustments:
+    balance = board.build_balance(player)
+    builds = {}
+    disbands = []
+
+    if balance > 0:
+        build_options = board.map_index.build_options
+
+        for province in board.free_home_centers(player):
+            builds[province] = tuple(
+                build(make_unit(unit_type, tile, player, board)) for unit_type, tile in build_options[province.id]
+            )
+
+    elif balance < 0:
+        disbands = [disband(unit) for unit in board.units_of(player)]
+
+    return PowerAdjustments(player, balance, builds, disbands)
+
+
+def get_all_possible_adjustment_orders(board) -> Dict['Player', PowerAdjustments]:
+    """ adjustment choices of every power that has to build or disband """
+    adjustments = {}
+
+    for player in board.players().values():
+        if board.build_balance(player) != 0:
+            adjustments[player] = get_power_adjustments(board, player)
+
+    return adjustments
@@ -1,13 +1,36 @@
 from dgame.power import Player
 from dgame.province import Province
 
-from dgame.board.unit import Unit, make_unit
+from dgame.board.unit import Unit, UnitType, Army, Fleet, make_unit, retreat_tiles
 from dgame.board.definition import AbstractBoardDefinition
+from dgame.board.state import BoardState, EMPTY
+from dgame.board.map_index import MapIndex, get_map_index
+from dgame.board.observer import BoardObserver
+from dgame.board.diff import BoardDiff, diff_boards
+from dgame.board.phase import Phase, Season, PhaseType, SPRING, FALL, MOVEMENT, RETREATS, ADJUSTMENTS
 
-from dgame.order import Order
+from dgame.order import Order, move, disband
 from dgame.order import HOLD, MOVE, CONVOY, CONVOY_MOVE, SUPPORT_MOVE, SUPPORT, RETREAT, BUILD, DISBAND, WAIVE
 
-from typing import List, Optional, Tuple, Set
+from contextlib import contextmanager
+from copy import copy
+import struct
+
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple, Set, Union
+
+# journal entry of a group of moves that can only be reverted all at once (swaps, cycles)
+_MOVE_CYCLE = 'move_cycle'
+# journal entries of the phase changes and of the dislodged units waiting for the retreat phase
+_PHASE = 'phase'
+_RETREATS = 'retreats'
+
+# binary encoding of a board:
+#   header, owner names, one (province id, unit type, owner) record per unit,
+#   owner of every supply center, dislodged units with their attacker and the contested provinces
+_VERSION = 2
+_HEADER = struct.Struct('<BBHHBBBB')    # version, owners, units, year, season, phase type, dislodged, contested
+_UNIT_RECORD = np.dtype([('loc', '<i2'), ('type', 'i1'), ('owner', 'i1')])
 
 
 class Board:
@@ -20,20 +43,50 @@ class Board:
 
     def __init__(self, board_definition: AbstractBoardDefinition, players: List[Player]):
         self._definition = board_definition
+        # immutable data derived from the definition, shared by all the boards of the same map
+        self._map = get_map_index(board_definition)
         self._powers = {
             p.power[0]: p for p in players
         }
-        self._units = set()
-        self._loc_unit = {}
-        self._time = 0
+        # owner index stored inside the board state arrays
+        self._owners = []
+        self._owner_index = {}
+        # home supply centers of every owner
+        self._homes = []
+        for p in players:
+            self._owner_id(p)
+
+        self._state = BoardState(self._map.size, self._map.zobrist)
+        self._phase = Phase(self._map.start_year, SPRING, MOVEMENT)
+
+        # units dislodged during the last movement phase {province id: (unit, attacker province id)}
+        # and provinces left empty by a standoff, units cannot retreat there
+        self._dislodged = {}
+        self._contested = set()
 
-        self._convoys = {}
-        self.get_all_possible_convoy()
+        # id of the units this board is allowed to mutate in place, units not in that set
+        # are shared with forked boards and need to be copied before being modified
+        self._private = set()
+
+        # list of changes that can be reverted with `undo`, None when we are not recording
+        self._journal = None
+
+        # objects notified of the changes (see `BoardObserver`), None when nobody is listening
+        self._observers = None
+
+        for name, player in self._powers.items():
+            homes = self._map.home_centers.get(name, ())
+            self._state.set_center_owners(homes, [self._owner_index[player]] * len(homes))
 
         # Board wide cache we do not want to put caches in a lot of different places
         # so we should put them in only one spot for invalidation
+        # (kind, province id) => (unit, value); entries are dropped when one of the provinces they depend on changes
         self._cache = {}
+        # province id => keys of the cache entries depending on that province
+        self._cache_deps = {}
+        self._make_dispatch()
 
+    def _make_dispatch(self):
         self.instruction_dispatch = {
             HOLD: self.hold,
             MOVE: self.move_unit,
@@ -51,10 +104,232 @@ class Board:
     def __check_ownerships(player: Player, unit: Unit, message: str):
         assert unit.owner is player, '{}; the unit {} is owned by {} not {}'.format(message, unit, unit.owner, player)
 
+    def _owner_id(self, player: Player) -> int:
+        oid = self._owner_index.get(player)
+
+        if oid is None:
+            oid = len(self._owners)
+            self._owners.append(player)
+            self._owner_index[player] = oid
+
+            name = next((name for name, p in self._powers.items() if p is player), None)
+            self._homes.append(self._map.home_centers.get(name, ()))
+
+        return oid
+
+    def fork(self) -> 'Board':
+        """ Make a new board with the same unit placement.
+            The definition, map index and players are shared; only the placement arrays are copied.
+            Units are shared between the two boards until one of them modifies them (copy-on-write) """
+        board = Board.__new__(Board)
+        board._definition = self._definition
+        board._map = self._map
+        board._powers = self._powers
+        board._owners = list(self._owners)
+        board._homes = list(self._homes)
+        board._owner_index = dict(self._owner_index)
+        board._state = self._state.copy()
+        board._phase = self._phase
+        board._dislodged = dict(self._dislodged)
+        board._contested = set(self._contested)
+        board._private = set()
+        board._journal = None
+        board._observers = None
+        board._cache = {}
+        board._cache_deps = {}
+        board._make_dispatch()
+
+        # units are now shared
+        self._private = set()
+        return board
+
+    def _own_unit(self, pid: int) -> Optional[Unit]:
+        """ return the unit on `pid` making sure it is not shared with another board """
+        unit = self._state.units[pid]
+
+        if unit is None or id(unit) in self._private:
+            return unit
+
+        unit = copy(unit)
+        unit.board = self
+        self._state.units[pid] = unit
+        self._private.add(id(unit))
+        return unit
+
+    def _restore_unit(self, unit: Unit, loc: Province) -> Unit:
+        """ return `unit` back on `loc`; a unit moved in place might have been shared with a fork since then """
+        if unit.loc is loc:
+            return unit
+
+        if id(unit) not in self._private:
+            unit = copy(unit)
+            unit.board = self
+            self._private.add(id(unit))
+
+        unit.loc = loc
+        return unit
+
+    # Journal
+    def start_journal(self):
+        """ start recording the changes made to the board so they can be reverted with `undo` """
+        if self._journal is None:
+            self._journal = []
+
+    def stop_journal(self):
+        self._journal = None
+
+    def undo(self, n: int = 1):
+        """ revert the last `n` changes recorded in the journal """
+        journal = self._journal
+        assert journal is not None, 'Cannot undo; changes are not recorded'
+        assert n <= len(journal), 'Cannot undo {} changes only {} were recorded'.format(n, len(journal))
+
+        state = self._state
+        for _ in range(n):
+            change = journal.pop()
+            kind = change[0]
+
+            if kind is BUILD:
+                _, pid = change
+                unit = state.remove(pid)
+                self._private.discard(id(unit))
+
+                if self._observers is not None:
+                    for observer in self._observers:
+                        observer.unit_disbanded(self, pid)
+
+            elif kind is MOVE:
+                _, src, dest, unit, loc, owner = change
+                moved = state.remove(dest)
+
+                # the unit was copied on write, drop the copy and restore the original
+                if moved is not unit:
+                    self._private.discard(id(moved))
+
+                state.place(src, self._restore_unit(unit, loc), owner)
+
+                if self._observers is not None:
+                    for observer in self._observers:
+                        observer.unit_moved(self, dest, src)
+
+            elif kind is DISBAND:
+                # the unit might have been shared since then so we do not make it private again
+                _, pid, unit, owner = change
+                state.place(pid, unit, owner)
+
+                if self._observers is not None:
+                    for observer in self._observers:
+                        observer.unit_built(self, pid)
+
+            elif kind is _MOVE_CYCLE:
+                # all the units need to be lifted before they can be put back
+                _, moves = change
+                moved = [state.remove(dest) for _, dest, _, _, _ in moves]
+
+                for (src, _, unit, loc, owner), m in zip(moves, moved):
+                    if m is not unit:
+                        self._private.discard(id(m))
+
+                    state.place(src, self._restore_unit(unit, loc), owner)
+
+                if self._observers is not None:
+                    for observer in self._observers:
+                        for src, dest, _, _, _ in moves:
+                            observer.unit_moved(self, dest, src)
+
+            elif kind is _PHASE:
+                _, phase, centers, self._dislodged, self._contested = change
+                previous, self._phase = self._phase, phase
+                state.set_center_owners([pid for pid, _ in centers], [owner for _, owner in centers])
+
+                if self._observers is not None:
+                    for observer in self._observers:
+                        observer.phase_advanced(self, previous, phase)
+
+            elif kind is _RETREATS:
+                _, self._dislodged, self._contested = change
+
+    @contextmanager
+    def transaction(self, rollback: bool = False):
+        """ revert all the changes made inside the block if an exception is raised
+            or if `rollback` is set; useful to evaluate a position without copying the board """
+        enabled = self._journal is None
+        self.start_journal()
+        mark = len(self._journal)
+
+        try:
+            yield self
+        except BaseException:
+            self.undo(len(self._journal) - mark)
+            raise
+        else:
+            if rollback:
+                self.undo(len(self._journal) - mark)
+        finally:
+            if enabled:
+                self._journal = None
+
+    # Observers
+    def add_observer(self, observer: BoardObserver):
+        """ notify `observer` of the changes made to this board; forks do not inherit the observers """
+        if self._observers is None:
+            self._observers = []
+
+        self._observers.append(observer)
+
+    def remove_observer(self, observer: BoardObserver):
+        self._observers.remove(observer)
+
+        if not self._observers:
+            self._observers = None
+
     def invalidate_cache(self):
+        """ drop the cache entries depending on the provinces that changed since the last call """
+        dirty = self._state.dirty
+        cache = self._cache
+        deps = self._cache_deps
+
+        for pid in dirty:
+            keys = deps.pop(pid, None)
+
+            if keys:
+                for key in keys:
+                    cache.pop(key, None)
+
+        dirty.clear()
+
+    def clear_cache(self):
         self._cache = {}
-        for unit in self._units:
-            unit.invalidate_cache()
+        self._cache_deps = {}
+        self._state.dirty.clear()
+
+    def get_cached(self, kind: str, unit: Unit):
+        """ return the value cached for `unit` or None if it needs to be recomputed """
+        if self._state.dirty:
+            self.invalidate_cache()
+
+        entry = self._cache.get((kind, unit.loc.without_coast.id))
+
+        if entry is None or entry[0] is not unit:
+            return None
+
+        return entry[1]
+
+    def set_cached(self, kind: str, unit: Unit, value, provinces: Iterable[int]):
+        """ cache `value` for `unit` until one of the `provinces` changes """
+        key = (kind, unit.loc.without_coast.id)
+        self._cache[key] = (unit, value)
+
+        deps = self._cache_deps
+        for pid in provinces:
+            keys = deps.get(pid)
+
+            if keys is None:
+                deps[pid] = {key}
+            else:
+                keys.add(key)
+
+        return value
 
     def process_order(self, player: Player, order: Order):
         return self.instruction_dispatch[order.order](player, order)
@@ -64,30 +339,348 @@ class Board:
 
         unit = make_unit(order.unit.unit_type, order.unit.loc, player, self)
         unit.owner = player
-        player.units.add(unit)
-        self._units.add(unit)
-        self._loc_unit[unit.loc.without_coast] = unit
+        pid = unit.loc.without_coast.id
+        self._state.place(pid, unit, self._owner_id(player))
+        self._private.add(id(unit))
+
+        if self._journal is not None:
+            self._journal.append((BUILD, pid))
+
+        if self._observers is not None:
+            for observer in self._observers:
+                observer.unit_built(self, pid)
         return unit
 
     # can throw if unit does not belong to player
     def disband_unit(self, player: Player, order: Order):
         # Get current unit
-        unit = self._loc_unit.pop(order.unit.loc)
+        pid = order.unit.loc.without_coast.id
+
+        # dislodged units are not on the board anymore
+        if self._phase.kind == RETREATS and pid in self._dislodged:
+            self.__check_ownerships(player, self._dislodged[pid][0], 'Cannot disband')
+            self._drop_dislodged(pid)
+            return
+
+        unit = self._state.units[pid]
 
         self.__check_ownerships(player, unit, 'Cannot disband')
 
-        player.units.remove(unit)
-        self._units.discard(unit)
+        if self._journal is not None:
+            self._journal.append((DISBAND, pid, unit, int(self._state.owner[pid])))
+
+        self._state.remove(pid)
+        self._private.discard(id(unit))
+
+        if self._observers is not None:
+            for observer in self._observers:
+                observer.unit_disbanded(self, pid)
 
     def move_unit(self, player: Player, order: Order):
-        assert self._loc_unit.get(order.dest.without_coast) is None, 'Cannot move unit {} {}'
+        dest = order.dest.without_coast.id
+        assert self._state.units[dest] is None, 'Cannot move unit {} {}'.format(order.unit, order.dest)
 
-        unit = self._loc_unit.pop(order.unit.loc.without_coast)
+        src = order.unit.loc.without_coast.id
+        unit = self._state.units[src]
 
         self.__check_ownerships(player, unit, 'Cannot move')
 
-        self._loc_unit[order.dest.without_coast] = unit
-        unit.loc = order.dest
+        owner = self._owner_id(player)
+        if self._journal is not None:
+            self._journal.append((MOVE, src, dest, unit, unit.loc, owner))
+
+        self._relocate(src, dest, order.dest, owner)
+
+        if self._observers is not None:
+            for observer in self._observers:
+                observer.unit_moved(self, src, dest)
+
+    def _relocate(self, src: int, dest: int, loc: Province, owner: int):
+        unit = self._own_unit(src)
+        self._state.remove(src)
+        unit.loc = loc
+        self._state.place(dest, unit, owner)
+
+    def process_orders(self, orders_by_power: Dict[Player, Iterable[Order]]):
+        """ Apply all the orders of a phase at once.
+            Disbands are applied first, then the moves in dependency order (a unit moves only once the unit
+            on its destination left) and finally the builds. Swaps and cycles are applied by lifting
+            one unit off the board. Dislodged units retreating to the same province are disbanded.
+            The phase is either fully applied or not at all """
+        disbands = []
+        builds = []
+        moves = {}      # src id => (player, order, dest id)
+        dests = set()
+        retreats = {}   # dest id => [(player, order)]
+
+        for player, orders in orders_by_power.items():
+            for order in orders:
+                kind = order.order
+
+                if kind is RETREAT:
+                    retreats.setdefault(order.dest.without_coast.id, []).append((player, order))
+
+                elif kind is MOVE or kind is CONVOY_MOVE:
+                    src = order.unit.loc.without_coast.id
+                    dest = order.dest.without_coast.id
+
+                    assert dest not in dests, 'Cannot move unit {} {}; destination is taken'.format(order.unit, order.dest)
+                    dests.add(dest)
+                    moves[src] = (player, order, dest)
+
+                elif kind is DISBAND:
+                    disbands.append((player, order))
+
+                elif kind is BUILD:
+                    builds.append((player, order))
+
+        with self.transaction():
+            for player, order in disbands:
+                self.disband_unit(player, order)
+
+            for dest, orders in retreats.items():
+                if len(orders) == 1:
+                    self.retreat_unit(*orders[0])
+                else:
+                    for player, order in orders:
+                        self.disband_unit(player, disband(order.unit))
+
+            self._process_moves(moves)
+
+            for player, order in builds:
+                self.build_unit(player, order)
+
+        self.invalidate_cache()
+
+    def apply_resolution(self, resolution: 'Resolution'):
+        """ Apply the outcome of a movement phase (see `dgame.board.adjudicator.resolve_movement`).
+            Dislodged units are removed from the board, they are kept in the resolution for the retreat phase """
+        moves = {}
+        for dest, (unit, loc) in resolution.moves().items():
+            moves[unit.loc.without_coast.id] = (unit.owner, move(unit, loc), dest)
+
+        with self.transaction():
+            for unit, _ in resolution.dislodged.values():
+                self.disband_unit(unit.owner, disband(unit))
+
+            self._process_moves(moves)
+
+            self._journal.append((_RETREATS, self._dislodged, self._contested))
+            self._dislodged = dict(resolution.dislodged)
+            self._contested = set(resolution.contested)
+
+        self.invalidate_cache()
+
+    # Phases
+    @property
+    def phase(self) -> Phase:
+        return self._phase
+
+    def set_phase(self, phase: Union[str, Phase]):
+        """ set the current phase i.e `board.set_phase('F1901M')` """
+        if isinstance(phase, str):
+            phase = Phase.parse(phase)
+
+        previous, self._phase = self._phase, phase
+
+        if self._observers is not None:
+            for observer in self._observers:
+                observer.phase_advanced(self, previous, phase)
+
+    def advance_phase(self) -> Phase:
+        """ Move to the next phase, the retreat and adjustment phases are skipped when there is nothing to do.
+            Dislodged units that did not retreat are disbanded and supply centers change owner
+            at the end of the fall """
+        phase = self._phase
+        retreats = phase.kind == MOVEMENT and any(self._can_retreat(unit, a) for unit, a in self._dislodged.values())
+        changes = []
+        journal = (_PHASE, phase, changes, self._dislodged, self._contested)
+
+        if not retreats and phase.kind != ADJUSTMENTS:
+            self._dislodged = {}
+            self._contested = set()
+
+            if phase.season == FALL:
+                changes.extend(self._update_centers())
+
+        self._phase = phase.next(retreats, self._needs_adjustments())
+
+        if self._journal is not None:
+            self._journal.append(journal)
+
+        if self._observers is not None:
+            for observer in self._observers:
+                observer.phase_advanced(self, phase, self._phase)
+
+        return self._phase
+
+    def _can_retreat(self, unit: Unit, attacker: int) -> bool:
+        return next(retreat_tiles(self, unit, attacker, self._contested), None) is not None
+
+    def _update_centers(self) -> List[Tuple[int, int]]:
+        """ occupied supply centers change owner, return the previous owner of the centers that changed """
+        state = self._state
+        centers = self._map.supply_centers
+
+        occupant = state.owner[centers]
+        changed = (occupant != EMPTY) & (occupant != state.center_owner[centers])
+
+        pids = centers[changed].tolist()
+        previous = state.center_owner[pids].tolist()
+        state.set_center_owners(pids, occupant[changed].tolist())
+
+        return list(zip(pids, previous))
+
+    def _needs_adjustments(self) -> bool:
+        """ does a power have to disband units or can it build on one of its free home centers """
+        state = self._state
+
+        for oid in range(len(self._owners)):
+            balance = state.center_count[oid] - state.unit_count[oid]
+
+            if balance < 0 or (balance > 0 and self._free_homes(oid)):
+                return True
+
+        return False
+
+    def _free_homes(self, oid: int) -> List[int]:
+        state = self._state
+        return [pid for pid in self._homes[oid] if state.center_owner[pid] == oid and state.units[pid] is None]
+
+    def free_home_centers(self, player: Player) -> List[Province]:
+        """ home supply centers owned by `player` where it can build """
+        oid = self._owner_index.get(player)
+
+        if oid is None:
+            return []
+
+        provinces = self._map.provinces
+        return [provinces[pid] for pid in self._free_homes(oid)]
+
+    @property
+    def dislodged(self) -> Dict[int, Tuple[Unit, int]]:
+        """ units dislodged during the last movement phase {province id: (unit, attacker province id)} """
+        return self._dislodged
+
+    @property
+    def contested(self) -> Set[int]:
+        """ provinces left empty by a standoff during the last movement phase """
+        return self._contested
+
+    # Supply centers
+    def center_count(self, player: Player) -> int:
+        oid = self._owner_index.get(player)
+        return 0 if oid is None else self._state.center_count[oid]
+
+    def unit_count(self, player: Player) -> int:
+        oid = self._owner_index.get(player)
+        return 0 if oid is None else self._state.unit_count[oid]
+
+    def build_balance(self, player: Player) -> int:
+        """ number of units `player` can build (> 0) or has to disband (< 0) during the adjustment phase """
+        oid = self._owner_index.get(player)
+
+        if oid is None:
+            return 0
+
+        return self._state.center_count[oid] - self._state.unit_count[oid]
+
+    def center_owner(self, loc: Province) -> Optional[Player]:
+        oid = self._state.center_owner[loc.without_coast.id]
+
+        if oid == EMPTY:
+            return None
+
+        return self._owners[oid]
+
+    def centers_of(self, player: Player) -> List[Province]:
+        oid = self._owner_index.get(player)
+
+        if oid is None:
+            return []
+
+        provinces = self._map.provinces
+        return [provinces[pid] for pid in np.flatnonzero(self._state.center_owner == oid)]
+
+    def winner(self, victory: Optional[int] = None) -> Optional[Player]:
+        """ return the player owning `victory` supply centers, by default more than half of them """
+        if victory is None:
+            victory = len(self._map.supply_centers) // 2 + 1
+
+        for oid, count in enumerate(self._state.center_count):
+            if count >= victory:
+                return self._owners[oid]
+
+        return None
+
+    def _process_moves(self, moves: Dict[int, Tuple[Player, Order, int]]):
+        units = self._state.units
+        journal = self._journal
+
+        # unit waiting for the destination to be freed; dest => src
+        waiting = {}
+        ready = []
+
+        for src, (player, order, dest) in moves.items():
+            unit = units[src]
+            self.__check_ownerships(player, unit, 'Cannot move')
+
+            occupant = units[dest]
+            if occupant is None:
+                ready.append(src)
+            else:
+                assert dest in moves, 'Cannot move unit {} {}'.format(order.unit, order.dest)
+                waiting[dest] = src
+
+        # Moves which destination is free, moving them frees their source for the next ones
+        while ready:
+            src = ready.pop()
+            player, order, dest = moves.pop(src)
+            owner = self._owner_id(player)
+
+            if journal is not None:
+                journal.append((MOVE, src, dest, units[src], units[src].loc, owner))
+
+            self._relocate(src, dest, order.dest, owner)
+
+            if self._observers is not None:
+                for observer in self._observers:
+                    observer.unit_moved(self, src, dest)
+
+            follower = waiting.pop(src, None)
+            if follower is not None:
+                ready.append(follower)
+
+        # What is left are cycles (A -> B -> A)
+        while moves:
+            start, (player, order, dest) = moves.popitem()
+            cycle = [(start, player, order, dest)]
+
+            src = waiting.pop(start)
+            while src != start:
+                p, o, d = moves.pop(src)
+                cycle.append((src, p, o, d))
+                src = waiting.pop(src)
+
+            if journal is not None:
+                journal.append((_MOVE_CYCLE, [
+                    (src, d, units[src], units[src].loc, self._owner_id(p)) for src, p, _, d in cycle]))
+
+            # lift the first unit; then every unit moves into the province freed by the previous one
+            lifted = self._own_unit(start)
+            self._state.remove(start)
+
+            for src, p, o, d in cycle[1:]:
+                self._relocate(src, d, o.dest, self._owner_id(p))
+
+            lifted.loc = order.dest
+            self._state.place(dest, lifted, self._owner_id(player))
+
+            # observers are told once the whole cycle is back on the board
+            if self._observers is not None:
+                for observer in self._observers:
+                    for src, _, _, d in cycle:
+                        observer.unit_moved(self, src, d)
 
     def hold(self, player: Player, order: Order):
         pass
@@ -105,67 +698,205 @@ class Board:
         pass
 
     def retreat_unit(self, player: Player, order: Order):
-        self.move_unit(player, order)
+        """ put a dislodged unit back on the board in `order.dest` """
+        pid = order.unit.loc.without_coast.id
+        dest = order.dest.without_coast.id
+        unit, _ = self._dislodged[pid]
+
+        self.__check_ownerships(player, unit, 'Cannot retreat')
+        assert self._state.units[dest] is None, 'Cannot retreat unit {} {}'.format(order.unit, order.dest)
+
+        self._drop_dislodged(pid)
+
+        # the dislodged unit might be shared with forks
+        unit = copy(unit)
+        unit.loc = order.dest
+        unit.board = self
+        self._state.place(dest, unit, self._owner_id(player))
+        self._private.add(id(unit))
+
+        if self._journal is not None:
+            self._journal.append((BUILD, dest))
+
+        if self._observers is not None:
+            for observer in self._observers:
+                observer.unit_built(self, dest)
+        return unit
+
+    def _drop_dislodged(self, pid: int):
+        if self._journal is not None:
+            self._journal.append((_RETREATS, self._dislodged, self._contested))
+
+        self._dislodged = {k: v for k, v in self._dislodged.items() if k != pid}
 
     def waive(self, player: Player, order: Order):
         pass
 
     # Game State Query
     def get_unit_at(self, loc: Province) -> Optional[Unit]:
-        return self._loc_unit.get(loc.without_coast)
+        return self._state.units[loc.without_coast.id]
+
+    def get_dislodged_at(self, loc: Province) -> Optional[Unit]:
+        dislodged = self._dislodged.get(loc.without_coast.id)
+        return None if dislodged is None else dislodged[0]
 
     def get_tile_by_id(self, index: int) -> Province:
-        return self._definition.PROVINCE_DB[index]
+        return self._map.provinces[index]
 
     def get_tile_by_name(self, name: str) -> Province:
-        return self._definition.province_from_string(name)
+        return self._map.name_to_province[name]
+
+    def units(self) -> List[Unit]:
+        return self._state.get_units()
+
+    def units_of(self, player: Player) -> List[Unit]:
+        """ return the units owned by `player` """
+        oid = self._owner_index.get(player)
+
+        if oid is None:
+            return []
+
+        return self._state.get_units(oid)
+
+    @property
+    def state(self) -> BoardState:
+        """ structure of arrays view of the unit placement """
+        return self._state
+
+    @property
+    def map_index(self) -> MapIndex:
+        """ immutable data of the map shared by every board """
+        return self._map
+
+    def diff(self, other: 'Board') -> BoardDiff:
+        """ changes needed to go from this board to `other` (see `BoardDiff`) """
+        return diff_boards(self, other)
+
+    @property
+    def zobrist_hash(self) -> int:
+        """ 64 bits hash of the unit placement, two boards with the same placement have the same hash """
+        return self._state.hash
+
+    # Serialization
+    def to_bytes(self) -> bytes:
+        """ encode the board as (province id, unit type, owner) records, owners are saved by name """
+        names = {id(p): name for name, p in self._powers.items()}
+        state = self._state
+        pids = state.occupied()
+        year, season, kind = self._phase
+
+        units = np.empty(len(pids), dtype=_UNIT_RECORD)
+        units['loc'] = state.coast[pids]
+        units['type'] = state.unit_type[pids]
+        units['owner'] = state.owner[pids]
+
+        dislodged = np.empty(len(self._dislodged), dtype=_UNIT_RECORD)
+        attackers = np.empty(len(self._dislodged), dtype='<i2')
+        for i, (unit, attacker) in enumerate(self._dislodged.values()):
+            dislodged[i] = (unit.loc.id, unit.unit_type, self._owner_id(unit.owner))
+            attackers[i] = attacker
+
+        data = [_HEADER.pack(
+            _VERSION, len(self._owners), len(pids), year, season, kind, len(self._dislodged), len(self._contested))]
+
+        for player in self._owners:
+            name = names[id(player)].encode('utf-8')
+            data.append(bytes((len(name),)))
+            data.append(name)
+
+        data.append(units.tobytes())
+        data.append(state.center_owner[self._map.supply_centers].tobytes())
+        data.append(dislodged.tobytes())
+        data.append(attackers.tobytes())
+        data.append(np.array(sorted(self._contested), dtype='<i2').tobytes())
+        return b''.join(data)
+
+    @staticmethod
+    def from_bytes(map_index: MapIndex, data: bytes, players: Optional[List[Player]] = None) -> 'Board':
+        """ decode a board encoded with `to_bytes`; owners are matched by name with `players`
+            which defaults to the powers of the map definition """
+        version, owner_count, unit_count, year, season, kind, dislodged_count, contested_count = \
+            _HEADER.unpack_from(data, 0)
+        assert version == _VERSION, 'Cannot decode board; unsupported version {}'.format(version)
+
+        if players is None:
+            players = [Player(p) for p in map_index.definition.initial_condition()]
+
+        board = Board(map_index.definition, players)
+        board._phase = Phase(year, Season(season), PhaseType(kind))
+
+        owners = []
+        offset = _HEADER.size
+        for _ in range(owner_count):
+            size = data[offset]
+            name = data[offset + 1:offset + 1 + size].decode('utf-8')
+            offset += 1 + size
+
+            player = board._powers.get(name)
+            if player is None:
+                player = Player((name,))
+                board._powers[name] = player
+
+            owners.append(board._owner_id(player))
+
+        def read(dtype, count):
+            nonlocal offset
+            array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+            offset += array.nbytes
+            return array.tolist()
+
+        state = board._state
+        provinces = map_index.provinces
+        owned_by = board._owners
+
+        for loc, unit_type, owner in read(_UNIT_RECORD, unit_count):
+            province = provinces[loc]
+            unit = make_unit(UnitType(unit_type), province, owned_by[owners[owner]], board)
+
+            state.place(province.without_coast.id, unit, owners[owner])
+            board._private.add(id(unit))
+
+        centers = map_index.supply_centers
+        state.set_center_owners(
+            centers.tolist(), [EMPTY if owner == EMPTY else owners[owner] for owner in read('i1', len(centers))])
+
+        dislodged = read(_UNIT_RECORD, dislodged_count)
+        for (loc, unit_type, owner), attacker in zip(dislodged, read('<i2', dislodged_count)):
+            province = provinces[loc]
+            unit = make_unit(UnitType(unit_type), province, owned_by[owners[owner]], board)
+            board._dislodged[province.without_coast.id] = (unit, attacker)
+
+        board._contested = set(read('<i2', contested_count))
+        return board
 
-    def units(self):
-        return self._units
+    def __reduce__(self):
+        return _board_from_bytes, (self._map, self.to_bytes())
 
     def players(self):
-        return self._players
+        return self._powers
 
     def get_player(self, name: str):
-        return self._players[name]
+        return self._powers[name]
 
     def get_all_possible_convoy(self):
-        from dgame.board.convoys_paths import build_convoy_paths_cache
+        return self._map.convoys
 
-        cv = build_convoy_paths_cache(self._definition)
+    def is_convoy_paths(self, loc:  Province, depth: int, dest: Province) -> bool:
+        """ can a unit in `loc` be convoyed to `dest` by `depth` fleets """
+        return self._map.convoys.has_path(loc.id, depth, dest.id)
 
-        def sort(lst):
-            lst = list(lst)
-            lst.sort()
-            return lst
+    def get_convoy_path(self, loc:  Province, depth: int, dest: Province) -> Optional[Tuple[Province, ...]]:
+        """ return the fleets of a convoy path of length `depth` from `loc` to `dest` """
+        lengths = self._map.convoys.lengths(loc.id, dest.id)
 
-        def convert(paths):
-            return ((start, tuple(sort(fleets)), tuple(sort(end))) for (start, fleets, end) in paths)
+        if lengths is None or depth not in lengths:
+            return None
 
-        aa = ((c, convert(p)) for c, p in sort(cv.items()))
+        return self._map.convoys.fleets(lengths[depth][0])
 
-        for count, paths in aa:
-            for (start, fleets, ends) in paths:
-                # if start not in self._convoys:
-                #     self._convoys[start] = {}
-                #
-                # if count not in self._convoys[start]:
-                #     self._convoys[start][count] = {}
-                #
-                # for dest in ends:
-                #     self._convoys[start][count][dest] = set(fleets)
-
-                for dest in ends:
-                    self._convoys[(start.short, count, dest.short)] = tuple(fleets)
-                    #print(start.short, count, dest.short)
-
-                # print(start.__class__)
-
-    def is_convoy_paths(self, loc:  Province, depth: int, dest: Province) -> Tuple[Set[Province], Set[Province]]:
-        return self._convoys.get((loc.short, depth, dest.short))
-
-    def get_convoy_path(self, loc:  Province, depth: int, dest: Province) -> Tuple[Set[Province], Set[Province]]:
-        return self._convoys.get((loc.short, depth, dest.short))
+    def get_convoy_lengths(self, loc: Province, dest: Province) -> Optional[Dict[int, Tuple[int, ...]]]:
+        """ return all the convoy paths from `loc` to `dest` as {number of fleets: (fleet mask, ...)} """
+        return self._map.convoys.lengths(loc.id, dest.id)
 
     class _Power:
         """ wrapper for compatibility will be removed later """
@@ -176,27 +907,135 @@ class Board:
 
     def from_game_state(self, game):
         """ initialize a board given a game engine instance """
-        from dgame.order import build
-        assert self._convoys, 'The map was not initialized properly convoy are not available'
-
-        self._powers = {}
-        self._units = set()
-        self._loc_unit = {}
-
-        for name, obj in game.powers.items():
-            power = self._Power(obj)
-            self._powers[name] = power
-
-            for unit in obj.units:
-                unittype, loc = unit.split(' ')
-                #self.build_unit(power, unittype, self.get_tile_by_name(loc))
-
-                self.build_unit(power, build(make_unit(unittype, self.get_tile_by_name(loc))))
+        assert self._map.convoys, 'The map was not initialized properly convoy are not available'
+
+        powers = {name: self._Power(obj) for name, obj in game.powers.items()}
+        self.load_units(
+            {name: obj.units for name, obj in game.powers.items()},
+            powers,
+            {name: obj.centers for name, obj in game.powers.items()})
+
+        # FORMING and COMPLETED are not phases of the board
+        name = game.get_current_phase()
+        if name[1:-1].isdigit():
+            self.set_phase(name)
+
+        if self._phase.kind == RETREATS:
+            self._load_retreats({name: obj.retreats for name, obj in game.powers.items()})
+
+    def _load_retreats(self, retreats: Dict[str, Dict[str, Iterable[str]]]):
+        """ load the dislodged units of the game engine {power: {'A PAR': ['BUR', 'PIC']}}.
+            The engine only gives the provinces a unit can retreat to; the other empty neighbours are either the
+            province the attack came from or contested. Contested provinces are closed to every dislodged unit so
+            a province open to one unit but not to another is the origin of the attack on the latter """
+        table = self._map.units
+        provinces = self._map.name_to_province
+        units = self._state.units
+        classes = (Army, Fleet)
+
+        # dislodged province id => empty neighbours the unit cannot retreat to
+        blocked_by = {}
+        allowed_by_any = set()
+
+        for name, dislodged in retreats.items():
+            player = self._powers[name]
+
+            for unit_name, dests in dislodged.items():
+                unit_type, loc = table[unit_name]
+                allowed = {provinces[dest].without_coast.id for dest in dests}
+                allowed_by_any.update(allowed)
+
+                blocked = set()
+                for tile in self._map.unit_adjacency[unit_type][loc.id]:
+                    pid = tile.without_coast.id
+
+                    if units[pid] is None and pid not in allowed:
+                        blocked.add(pid)
+
+                blocked_by[loc.without_coast.id] = blocked
+                self._dislodged[loc.without_coast.id] = (classes[unit_type](loc, player, self), -1)
+
+        for pid, blocked in blocked_by.items():
+            # a unit is attacked from a single province
+            origin = blocked & allowed_by_any
+
+            if origin:
+                attacker = min(origin)
+            elif len(blocked) == 1:
+                attacker = next(iter(blocked))
+            else:
+                # the attack came from one of them but they are closed to every unit next to them anyway
+                attacker = -1
+
+            self._contested.update(blocked - allowed_by_any - {attacker})
+            unit, _ = self._dislodged[pid]
+            self._dislodged[pid] = (unit, attacker)
+
+    def load_units(self, units: Dict[str, Iterable[str]], players: Optional[Dict[str, Player]] = None,
+                   centers: Optional[Dict[str, Iterable[str]]] = None):
+        """ replace the unit placement by `units` i.e {'FRANCE': ['A PAR', 'F BRE', ...], ...}.
+            If `players` is given the board players are replaced, else units are given to the current players.
+            If `centers` is given the supply center ownership is replaced i.e {'FRANCE': ['PAR', 'BRE'], ...} """
+        if players is not None:
+            self._powers = dict(players)
+            self._owners = []
+            self._owner_index = {}
+            self._homes = []
+            for player in players.values():
+                self._owner_id(player)
+
+        self._private = set()
+        self._state.clear()
+        self.clear_cache()
+
+        # the previous placement is gone we cannot revert to it anymore
+        if self._journal is not None:
+            self._journal.clear()
+
+        table = self._map.units
+        classes = (Army, Fleet)
+        new_units = []
+        owners = []
+
+        for name, unit_names in units.items():
+            player = self._powers.get(name)
+
+            if player is None:
+                player = Player((name,))
+                self._powers = dict(self._powers)
+                self._powers[name] = player
+
+            owner = self._owner_id(player)
+
+            for unit_name in unit_names:
+                unit_type, loc = table[unit_name]
+                new_units.append(classes[unit_type](loc, player, self))
+                owners.append(owner)
+
+        self._state.place_all(new_units, owners)
+        self._private.update(id(unit) for unit in new_units)
+        self._dislodged = {}
+        self._contested = set()
+
+        if centers is not None:
+            pids = self._map.supply_centers.tolist()
+            self._state.set_center_owners(pids, [EMPTY] * len(pids))
+
+            provinces = self._map.name_to_province
+            for name, center_names in centers.items():
+                pids = [provinces[center].id for center in center_names]
+                self._state.set_center_owners(pids, [self._owner_id(self._powers[name])] * len(pids))
+
+        if self._observers is not None:
+            for observer in self._observers:
+                observer.board_reset(self)
 
     def size(self):
-        return len(self._definition.PROVINCE_DB)
+        return self._map.size
 
 
+def _board_from_bytes(map_index: MapIndex, data: bytes) -> Board:
+    return Board.from_bytes(map_index, data)
 
 
 if __name__ == '__main__':
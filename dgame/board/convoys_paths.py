@@ -1,3 +1,18 @@
+import hashlib
+import os
+
+import numpy as np
+
+from dgame.province import Province
+
+from typing import Dict, Optional, Tuple
+
+# folder where the convoy tables are saved, can be overridden with the DGAME_CACHE_DIR environment variable
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'dgame')
+
+# version of the cache file layout, part of the file name so a change of layout or of the way paths are generated
+# does not load stale files
+CACHE_VERSION = 2
 
 
 def __get_convoy_paths(start_location, max_convoy_length, queue):
@@ -122,3 +137,146 @@ def build_convoy_paths_cache(map_def, max_convoy_length=25):
     # Returning
     print('Found {} convoy paths for {}\n'.format(len(results), ''))
     return buckets
+
+
+class ConvoyTable:
+    """
+        Convoy table stored as rows of (start id, dest id, number of fleets, fleet mask) sorted in that order;
+        the fleets are stored as a bitmask over the water provinces (bit i => `water[i]`).
+        The rows can be a memory mapped file shared by every process, the paths of a (start, dest) pair are
+        only decoded the first time they are looked up.
+
+        >>> table.has_path(yor.id, 2, edi.id)
+        >>> table.lengths(yor.id, edi.id)
+        {1: (1,), 2: (3, 5, ...), ...}
+    """
+    __slots__ = ('size', 'water', 'water_bit', 'rows', 'offsets', '_lengths')
+
+    def __init__(self, provinces, rows: np.ndarray):
+        self.size = len(provinces)
+        self.water = [p for p in provinces if p.is_water]
+        self.water_bit = [0] * self.size
+        for i, p in enumerate(self.water):
+            self.water_bit[p.id] = 1 << i
+
+        # rows of the pair `start * size + dest` are rows[offsets[idx]:offsets[idx + 1]]
+        self.rows = rows
+        keys = rows[:, 0].astype(np.int64) * self.size + rows[:, 1].astype(np.int64)
+        self.offsets = np.searchsorted(keys, np.arange(self.size * self.size + 1)).tolist()
+        self._lengths = {}
+
+    @staticmethod
+    def from_buckets(provinces, buckets) -> 'ConvoyTable':
+        """ make the table from the result of `build_convoy_paths_cache` """
+        empty = ConvoyTable(provinces, np.empty((0, 4), dtype=np.uint64))
+        water_bit = empty.water_bit
+        rows = set()
+
+        for count, paths in buckets.items():
+            for start, fleets, dests in paths:
+                mask = 0
+                for fleet in fleets:
+                    mask |= water_bit[fleet.id]
+
+                for dest in dests:
+                    rows.add((start.id, dest.id, count, mask))
+
+        # masks of maps with more than 64 water provinces do not fit in uint64
+        dtype = np.uint64 if len(empty.water) <= 64 else object
+        return ConvoyTable(provinces, np.array(sorted(rows), dtype=dtype).reshape((-1, 4)))
+
+    def lengths(self, start: int, dest: int) -> Optional[Dict[int, Tuple[int, ...]]]:
+        """ return every convoy path from `start` to `dest` as {number of fleets: (fleet mask, ...)} """
+        idx = start * self.size + dest
+        lengths = self._lengths.get(idx)
+
+        if lengths is None:
+            begin, end = self.offsets[idx], self.offsets[idx + 1]
+            if begin == end:
+                return None
+
+            lengths = {}
+            for count, mask in self.rows[begin:end, 2:].tolist():
+                lengths[count] = lengths.get(count, ()) + (mask,)
+
+            self._lengths[idx] = lengths
+
+        return lengths
+
+    def has_path(self, start: int, count: int, dest: int) -> bool:
+        lengths = self.lengths(start, dest)
+        return lengths is not None and count in lengths
+
+    def fleets_mask(self, fleets) -> int:
+        bits = self.water_bit
+        mask = 0
+        for fleet in fleets:
+            mask |= bits[fleet.id]
+        return mask
+
+    def fleets(self, mask: int) -> Tuple[Province, ...]:
+        """ return the water provinces of a fleet mask """
+        return tuple(p for i, p in enumerate(self.water) if mask >> i & 1)
+
+    def to_array(self) -> np.ndarray:
+        """ rows of (start id, dest id, number of fleets, fleet mask) """
+        return self.rows
+
+    @staticmethod
+    def from_array(provinces, rows: np.ndarray) -> 'ConvoyTable':
+        """ make the table from rows sorted by (start, dest, number of fleets, mask) like the ones of `to_array` """
+        return ConvoyTable(provinces, rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+
+def map_fingerprint(provinces, max_convoy_length: int) -> str:
+    """ hash of everything the convoy paths depend on; the topology of the map, the maximum path length
+        and the version of the cache layout """
+    sha = hashlib.sha256()
+    sha.update(str(CACHE_VERSION).encode())
+    sha.update(str(max_convoy_length).encode())
+
+    for p in provinces:
+        sha.update(repr((
+            p.id,
+            p.short,
+            p.is_water,
+            p.without_coast.id,
+            sorted(n.id for n in p.neighbours),
+            sorted(s.id for s in p.seas or ())
+        )).encode())
+
+    return sha.hexdigest()
+
+
+def load_convoy_table(map_def, max_convoy_length=25) -> ConvoyTable:
+    """ Load the convoy table of a map from the disk cache, building and saving it if it does not exist yet """
+    provinces = map_def.PROVINCE_DB
+    folder = os.environ.get('DGAME_CACHE_DIR', CACHE_DIR)
+    file_name = os.path.join(folder, 'convoys_{}.npy'.format(map_fingerprint(provinces, max_convoy_length)))
+
+    if os.path.exists(file_name):
+        return ConvoyTable.from_array(provinces, np.load(file_name, mmap_mode='r'))
+
+    table = ConvoyTable.from_buckets(provinces, build_convoy_paths_cache(map_def, max_convoy_length))
+
+    # masks are saved as uint64
+    if len(table.water) > 64:
+        return table
+
+    try:
+        os.makedirs(folder, exist_ok=True)
+
+        # write to a temporary file first so concurrent workers never read a partial table
+        tmp = '{}.{}.tmp'.format(file_name, os.getpid())
+        with open(tmp, 'wb') as file:
+            np.save(file, table.to_array())
+
+        os.replace(tmp, file_name)
+
+    except OSError as e:
+        print('Could not save the convoy table to {}: {}'.format(file_name, e))
+
+    return table
@@ -88,6 +88,7 @@ class BoardDefinitionFile(AbstractBoardDefinition):
         from dgame.board.parser import parse_map_definition
 
         parser = parse_map_definition(file_name)
+        self.file_name = file_name
 
         self.powers = parser.powers
         self.year = parser.year
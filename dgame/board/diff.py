@@ -0,0 +1,98 @@
+import numpy as np
+
+from dgame.board.state import EMPTY
+
+from collections import namedtuple
+
+
+class BoardDiff(namedtuple('BoardDiff', ['changed', 'added', 'removed', 'moved', 'centers', 'phase'])):
+    """
+        Changes needed to go from one board to another (see `Board.diff`)
+
+        changed: ids of the provinces (without coast) which unit changed
+        added  : units of the new board which are not on the old one
+        removed: units of the old board which are not on the new one
+        moved  : (old unit, new unit) a unit left a province for one of its neighbours
+        centers: {province id: new owner or None} supply centers that changed owner
+        phase  : phase of the new board or None when it did not change
+    """
+
+    def __bool__(self):
+        return bool(self.changed or self.centers or self.phase is not None)
+
+
+def _owner_name(board, player):
+    for name, p in board.players().items():
+        if p is player:
+            return name
+
+    return player
+
+
+def diff_boards(old: 'Board', new: 'Board') -> BoardDiff:
+    """ compare the unit placement and supply center ownership of two boards of the same map.
+        A unit of the same owner and type appearing next to the province another one left is considered moved;
+        convoyed units show up as removed and added """
+    assert old.map_index.size == new.map_index.size, 'Cannot diff boards of different maps'
+
+    a = old.state
+    b = new.state
+    old_owners = old._owners
+    new_owners = new._owners
+
+    # translate the owner indices of the new board into the indices of the old one, owners are matched by name
+    old_index = {_owner_name(old, p): oid for oid, p in enumerate(old_owners)}
+    same_owners = len(old_owners) == len(new_owners)
+    translate = [EMPTY]
+
+    for oid, player in enumerate(new_owners):
+        index = old_index.get(_owner_name(new, player))
+        same_owners = same_owners and index == oid
+        translate.append(len(old_owners) + oid if index is None else index)
+
+    translate = np.array(translate, dtype=np.int16)
+
+    changed = []
+    if not same_owners or a.hash != b.hash:
+        owner = translate[b.owner.astype(np.int16) + 1]
+        changed = np.flatnonzero((a.coast != b.coast) | (a.unit_type != b.unit_type) | (a.owner != owner)).tolist()
+
+    centers = {}
+    center_owner = translate[b.center_owner.astype(np.int16) + 1]
+    for pid in np.flatnonzero(a.center_owner != center_owner).tolist():
+        oid = int(b.center_owner[pid])
+        centers[pid] = None if oid == EMPTY else new_owners[oid]
+
+    removed = [a.units[pid] for pid in changed if a.units[pid] is not None]
+    added = [b.units[pid] for pid in changed if b.units[pid] is not None]
+    moved = []
+
+    if removed and added:
+        adjacency = old.map_index.unit_adjacency
+        arrivals = {}
+        for unit in added:
+            arrivals.setdefault((unit.loc.without_coast.id, unit.unit_type), []).append(unit)
+
+        left = []
+        for unit in removed:
+            oid = a.owner[unit.loc.without_coast.id]
+            target = None
+
+            for tile in adjacency[unit.unit_type][unit.loc.id]:
+                candidates = arrivals.get((tile.without_coast.id, unit.unit_type))
+
+                if candidates and translate[b.owner[tile.without_coast.id] + 1] == oid:
+                    target = candidates.pop()
+                    break
+
+            if target is None:
+                left.append(unit)
+            else:
+                moved.append((unit, target))
+
+        arrived = {id(unit) for _, unit in moved}
+        removed = left
+        added = [unit for unit in added if id(unit) not in arrived]
+
+    phase = new.phase if new.phase != old.phase else None
+    return BoardDiff(changed, added, removed, moved, centers, phase)
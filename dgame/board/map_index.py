@@ -0,0 +1,155 @@
+import numpy as np
+
+from dgame.province import Province
+from dgame.board.convoys_paths import ConvoyTable, load_convoy_table, map_fingerprint
+from dgame.board.zobrist import ZobristKeys, get_zobrist_keys
+from dgame.board.unit import ARMY, FLEET, make_unit
+
+from typing import Dict, List, Set, Tuple
+from weakref import WeakKeyDictionary
+
+# map index of every map loaded by the process, keyed by the content of the map (see `map_key`)
+# definitions of the same map share their index, so the cache only grows with the number of maps
+_indexes = {}   # type: Dict[Tuple, MapIndex]
+
+# content key of the definitions in use; the key does not reference the definition
+_keys = WeakKeyDictionary()
+
+# map index of the definition files loaded when unpickling boards
+_files = {}
+
+
+class MapIndex:
+    """
+        Immutable data derived from a board definition.
+        Built once per map and shared by every board of that map (and their forks),
+        boards should only hold their unit placement.
+
+        provinces: all the provinces of the map, indexed by their id
+        adjacency: ids of the neighbours of every province, coasts are merged with their province
+        unit_adjacency: [unit type][province id] => tiles the unit can move to without convoy
+        movers   : province id (without coast) => (unit type, tile) units that can move to the province without convoy
+        water_neighbours, land_neighbours: province id => neighbours of the province; used to walk convoy paths
+        build_options : province id => (unit type, tile) units that can be built on a province
+        convoys  : convoy paths between provinces (see `ConvoyTable`)
+        zobrist  : keys used to hash the unit placement
+        units    : unit string ('A PAR', 'F STP/SC') => (unit type, province)
+
+        supply_centers: ids of the supply centers
+        home_centers  : power name => ids of its home supply centers
+        start_year    : year of the first phase
+    """
+    __slots__ = ('definition', 'provinces', 'size', 'adjacency', 'convoys', 'zobrist', 'name_to_province', 'units',
+                 'unit_adjacency', 'movers', 'water_neighbours', 'land_neighbours', 'build_options', 'supply_centers',
+                 'home_centers', 'start_year', '__weakref__')
+
+    def __init__(self, definition: 'AbstractBoardDefinition'):
+        self.definition = definition
+        self.provinces = tuple(definition.PROVINCE_DB)     # type: Tuple[Province, ...]
+        self.size = len(self.provinces)
+        self.name_to_province = {p.short: p for p in self.provinces}
+
+        # every unit that can be written on the map so loading a position does not need to parse strings
+        self.units = {}     # type: Dict[str, Tuple[int, Province]]
+        for p in self.provinces:
+            self.units['A ' + p.short] = (0, p)
+            self.units['F ' + p.short] = (1, p)
+
+        self.adjacency = [set() for _ in self.provinces]  # type: List[Set[int]]
+        for province in self.provinces:
+            self.adjacency[province.without_coast.id].update(n.without_coast.id for n in province.neighbours)
+
+        self.water_neighbours = [tuple(n for n in p.neighbours if n.is_water) for p in self.provinces]
+        self.land_neighbours = [tuple(n for n in p.neighbours if not n.is_water) for p in self.provinces]
+
+        self.unit_adjacency = (
+            [tuple(make_unit(ARMY, p).adjacent_tiles()) for p in self.provinces],
+            [tuple(make_unit(FLEET, p).adjacent_tiles()) for p in self.provinces]
+        )   # type: Tuple[List[Tuple[Province, ...]], List[Tuple[Province, ...]]]
+
+        # reverse of `unit_adjacency`
+        movers = [[] for _ in self.provinces]
+        for unit_type, adjacency in enumerate(self.unit_adjacency):
+            for p, tiles in zip(self.provinces, adjacency):
+                for tile in tiles:
+                    movers[tile.without_coast.id].append((unit_type, p))
+
+        self.movers = [tuple(m) for m in movers]    # type: List[Tuple[Tuple[int, Province], ...]]
+
+        # armies on land, fleets on coasts; on the coasts of STP/NC STP/SC when the province has some
+        coasts = [[] for _ in self.provinces]
+        for p in self.provinces:
+            if p.without_coast is not p:
+                coasts[p.without_coast.id].append(p)
+
+        self.build_options = []     # type: List[Tuple[Tuple[int, Province], ...]]
+        for p in self.provinces:
+            options = []
+            if not p.is_water and p.without_coast is p:
+                options.append((ARMY, p))
+
+            if coasts[p.id]:
+                options.extend((FLEET, c) for c in coasts[p.id])
+            elif p.coasts:
+                options.append((FLEET, p))
+
+            self.build_options.append(tuple(options))
+
+        self.supply_centers = np.array([p.id for p in self.provinces if p.is_supply_center], dtype=np.int64)
+        self.home_centers = {}  # type: Dict[str, List[int]]
+        for power in definition.initial_condition():
+            self.home_centers[power[0]] = [self.name_to_province[name].id for name in power[2]]
+
+        self.start_year = int(getattr(definition, 'year', 1901))
+
+        self.convoys = load_convoy_table(definition)       # type: ConvoyTable
+        self.zobrist = get_zobrist_keys(self.size)         # type: ZobristKeys
+
+    def province(self, name: str) -> Province:
+        return self.name_to_province[name]
+
+    def __reduce__(self):
+        # reload the map from its file instead of pickling the province graph
+        file_name = getattr(self.definition, 'file_name', None)
+
+        if file_name is None:
+            return get_map_index, (self.definition,)
+
+        return load_map_index, (file_name,)
+
+
+def map_key(definition: 'AbstractBoardDefinition') -> Tuple:
+    """ everything the index is derived from; the province graph, the powers and the first year """
+    key = _keys.get(definition)
+
+    if key is None:
+        key = (map_fingerprint(definition.PROVINCE_DB, 0), repr(definition.initial_condition()),
+               int(getattr(definition, 'year', 1901)))
+        _keys[definition] = key
+
+    return key
+
+
+def get_map_index(definition: 'AbstractBoardDefinition') -> MapIndex:
+    """ return the index of the map of a definition, building it the first time the map is used """
+    key = map_key(definition)
+    index = _indexes.get(key)
+
+    if index is None:
+        index = MapIndex(definition)
+        _indexes[key] = index
+
+    return index
+
+
+def load_map_index(file_name: str) -> MapIndex:
+    """ return the index of a map definition file, the file is only parsed once per process """
+    from dgame.board.definition import BoardDefinitionFile
+
+    index = _files.get(file_name)
+
+    if index is None:
+        index = get_map_index(BoardDefinitionFile(file_name))
+        _files[file_name] = index
+
+    return index
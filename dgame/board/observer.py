@@ -0,0 +1,34 @@
+"""
+    Notifications of the changes made to a board so derived structures (feature encoders, order generators, ...)
+    can update only what changed instead of recomputing everything.
+
+    Provinces are given by id without coast, the board is already modified when an observer is called.
+"""
+from dgame.board.phase import Phase
+
+
+class BoardObserver:
+    """
+        Base class of the board observers, override the events you are interested in.
+        Reverting changes with `Board.undo` sends the opposite events (a build reverted is a disband, ...)
+    """
+
+    def unit_built(self, board: 'Board', pid: int):
+        """ a unit was added on `pid` (build or retreat) """
+        pass
+
+    def unit_moved(self, board: 'Board', src: int, dest: int):
+        """ the unit on `src` moved to `dest` """
+        pass
+
+    def unit_disbanded(self, board: 'Board', pid: int):
+        """ the unit on `pid` was removed from the board (disband or dislodgement) """
+        pass
+
+    def phase_advanced(self, board: 'Board', previous: Phase, phase: Phase):
+        """ the phase changed, supply centers might have changed owner """
+        pass
+
+    def board_reset(self, board: 'Board'):
+        """ the whole unit placement was replaced """
+        pass
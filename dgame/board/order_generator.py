@@ -0,0 +1,145 @@
+from dgame.board.observer import BoardObserver
+from dgame.board.unit import Context, _support_orders
+from dgame.order import Order
+from dgame.province import Province
+
+from typing import Dict, List, Set
+
+
+class OrderGenerator(BoardObserver):
+    """
+        Possible orders of the movement phase kept up to date while the board changes.
+        Returns the same orders as `get_all_possible_move_orders` but only the units whose orders changed are
+        recomputed (through the board cache) and only the supports to the destinations they can move to are rebuilt.
+
+        >>> generator = OrderGenerator(board)
+        >>> generator.possible_orders()
+        >>> board.process_orders(orders)
+        >>> generator.possible_orders()   # only repairs the orders around the units that moved
+    """
+
+    def __init__(self, board: 'Board'):
+        self.board = board
+
+        # unit province => (unit, (orders of the unit, convoys, moves)) as returned by `Unit.move_orders`
+        self._units = {}
+        # destination => {unit province: [move orders of the unit to the destination]}
+        self._moves = {}    # type: Dict[Province, Dict[Province, List[Order]]]
+        # destination => {unit province: support move orders to the destination}
+        self._supports = {}     # type: Dict[Province, Dict[Province, Set[Order]]]
+        # fleet province => {army province: convoy orders given to the fleet}
+        self._convoys = {}      # type: Dict[Province, Dict[Province, Set[Order]]]
+        # unit province => all its orders
+        self._orders = {}       # type: Dict[Province, Set[Order]]
+
+        self._stale = True
+        board.add_observer(self)
+
+    def close(self):
+        """ stop following the board """
+        self.board.remove_observer(self)
+
+    def possible_orders(self) -> Dict[Province, Set[Order]]:
+        """ {unit province: possible orders}; the sets are owned by the generator and should not be modified """
+        if self._stale:
+            self._update()
+
+        return self._orders
+
+    # Board events
+    def unit_built(self, board, pid):
+        self._stale = True
+
+    def unit_moved(self, board, src, dest):
+        self._stale = True
+
+    def unit_disbanded(self, board, pid):
+        self._stale = True
+
+    def board_reset(self, board):
+        self._stale = True
+
+    def _update(self):
+        context = Context(self.board)
+        current = {unit.loc.without_coast: unit for unit in self.board.units()}
+
+        # units which orders changed; the board cache keeps the orders of a unit until a province it depends on
+        # changes so untouched units return the exact same tuple
+        changed = [loc for loc in self._units if loc not in current]
+        added = []
+
+        for loc, unit in current.items():
+            cached = unit.move_orders(context)
+            entry = self._units.get(loc)
+
+            if entry is None or entry[0] is not unit or entry[1] is not cached:
+                changed.append(loc)
+                added.append((loc, unit, cached))
+
+        dests = set()
+        touched = set()
+
+        for loc in changed:
+            entry = self._units.pop(loc, None)
+            touched.add(loc)
+
+            if entry is None:
+                continue
+
+            _, (_, convoys, moves) = entry
+            for dest, _ in moves:
+                self._moves[dest].pop(loc, None)
+                dests.add(dest)
+
+            for fleet, _ in convoys:
+                self._convoys[fleet].pop(loc, None)
+                touched.add(fleet)
+
+        for loc, unit, cached in added:
+            self._units[loc] = (unit, cached)
+
+            _, convoys, moves = cached
+            for dest, order in moves:
+                self._moves.setdefault(dest, {}).setdefault(loc, []).append(order)
+                dests.add(dest)
+
+            for fleet, order in convoys:
+                self._convoys.setdefault(fleet, {}).setdefault(loc, set()).add(order)
+                touched.add(fleet)
+
+        # rebuild the supports of the destinations which movers changed
+        for dest in dests:
+            touched.update(self._supports.pop(dest, ()))
+
+            movers = self._moves.get(dest)
+            if not movers:
+                self._moves.pop(dest, None)
+                continue
+
+            supports = {}
+            orders = [order for unit_moves in movers.values() for order in unit_moves]
+            for unit, order in _support_orders(dest, orders):
+                supports.setdefault(unit.loc.without_coast, set()).add(order)
+
+            self._supports[dest] = supports
+            touched.update(supports)
+
+        for loc in touched:
+            entry = self._units.get(loc)
+
+            if entry is None:
+                self._orders.pop(loc, None)
+                continue
+
+            _, (unit_orders, _, moves) = entry
+            orders = set(unit_orders)
+
+            for convoys in self._convoys.get(loc, {}).values():
+                orders.update(convoys)
+
+            for dest in {dest for dest, _ in moves}:
+                orders.update(self._supports.get(dest, {}).get(loc, ()))
+
+            self._orders[loc] = orders
+
+        self._stale = False
@@ -0,0 +1,73 @@
+"""
+    A game year is a sequence of phases
+
+    S1901M  Spring movement
+    S1901R  Spring retreats         (only if units were dislodged)
+    F1901M  Fall movement
+    F1901R  Fall retreats           (only if units were dislodged)
+    W1901A  Winter adjustments      (only if a power has to build or disband)
+"""
+from enum import IntEnum, unique
+from collections import namedtuple
+
+
+@unique
+class Season(IntEnum):
+    Spring = 0
+    Fall = 1
+    Winter = 2
+
+
+@unique
+class PhaseType(IntEnum):
+    Movement = 0
+    Retreats = 1
+    Adjustments = 2
+
+
+SPRING = Season.Spring
+FALL = Season.Fall
+WINTER = Season.Winter
+
+MOVEMENT = PhaseType.Movement
+RETREATS = PhaseType.Retreats
+ADJUSTMENTS = PhaseType.Adjustments
+
+_SEASON_NAMES = 'SFW'
+_TYPE_NAMES = 'MRA'
+
+
+class Phase(namedtuple('Phase', ['year', 'season', 'kind'])):
+    """
+        year  : game year (1901)
+        season: Season
+        kind  : PhaseType
+    """
+
+    @staticmethod
+    def parse(name: str) -> 'Phase':
+        """ parse a phase name as used by the game engine i.e S1901M """
+        return Phase(int(name[1:-1]), Season(_SEASON_NAMES.index(name[0])), PhaseType(_TYPE_NAMES.index(name[-1])))
+
+    def next(self, retreats: bool, adjustments: bool) -> 'Phase':
+        """ return the phase following this one.
+            retreats   : were units dislodged during this (movement) phase
+            adjustments: will powers have to build or disband after this (fall) phase """
+        year, season, kind = self
+
+        if kind == MOVEMENT and retreats:
+            return Phase(year, season, RETREATS)
+
+        if kind == ADJUSTMENTS:
+            return Phase(year + 1, SPRING, MOVEMENT)
+
+        if season == SPRING:
+            return Phase(year, FALL, MOVEMENT)
+
+        if adjustments:
+            return Phase(year, WINTER, ADJUSTMENTS)
+
+        return Phase(year + 1, SPRING, MOVEMENT)
+
+    def __str__(self):
+        return '{}{}{}'.format(_SEASON_NAMES[self.season], self.year, _TYPE_NAMES[self.kind])
@@ -0,0 +1,144 @@
+import numpy as np
+
+from dgame.board.zobrist import MAX_OWNERS, ZobristKeys, get_zobrist_keys
+
+from typing import List, Optional
+
+# value stored in the arrays when a province is not occupied
+EMPTY = -1
+
+
+class BoardState:
+    """
+        Structure of arrays holding the unit placement of a board.
+        Every array is indexed by the id of the province without its coast; i.e one unit per province.
+
+        unit_type: UnitType of the unit on the province or EMPTY
+        owner    : index of the player owning the unit or EMPTY
+        coast    : id of the province the unit is really on (BUL/EC for a fleet in BUL/EC) or EMPTY
+        units    : Unit object standing on the province (plain list for fast scalar access)
+        hash     : zobrist hash of the placement, updated every time a unit is placed or removed
+        dirty    : provinces changed since the board last invalidated its cache
+
+        unit_count  : number of units of every owner
+        center_owner: owner of every supply center or EMPTY
+        center_count: number of supply centers of every owner
+    """
+    __slots__ = ('unit_type', 'owner', 'coast', 'units', 'hash', 'zobrist', 'dirty', 'unit_count', 'center_owner',
+                 'center_count')
+
+    def __init__(self, size: int, zobrist: Optional[ZobristKeys] = None):
+        self.unit_type = np.full(size, EMPTY, dtype=np.int8)
+        self.owner = np.full(size, EMPTY, dtype=np.int8)
+        self.coast = np.full(size, EMPTY, dtype=np.int16)
+        self.units = [None] * size
+        self.hash = 0
+        self.zobrist = zobrist or get_zobrist_keys(size)
+        self.dirty = set()
+        self.unit_count = [0] * MAX_OWNERS
+        self.center_owner = np.full(size, EMPTY, dtype=np.int8)
+        self.center_count = [0] * MAX_OWNERS
+
+    def place(self, pid: int, unit: 'Unit', owner: int):
+        """ put `unit` on the province `pid` """
+        self.unit_type[pid] = unit.unit_type
+        self.owner[pid] = owner
+        self.coast[pid] = unit.loc.id
+        self.units[pid] = unit
+        self.hash ^= self.zobrist.key(unit.loc.id, unit.unit_type, owner)
+        self.dirty.add(pid)
+        self.unit_count[owner] += 1
+
+    def place_all(self, units: List['Unit'], owners: List[int]):
+        """ put all the `units` on the board at once, their provinces need to be empty """
+        pids = [unit.loc.without_coast.id for unit in units]
+        types = [int(unit.unit_type) for unit in units]
+        locs = [unit.loc.id for unit in units]
+
+        self.unit_type[pids] = types
+        self.owner[pids] = owners
+        self.coast[pids] = locs
+
+        h = self.hash
+        key = self.zobrist.key
+        count = self.unit_count
+        for pid, unit, t, loc, owner in zip(pids, units, types, locs, owners):
+            self.units[pid] = unit
+            h ^= key(loc, t, owner)
+            count[owner] += 1
+
+        self.hash = h
+        self.dirty.update(pids)
+
+    def remove(self, pid: int) -> Optional['Unit']:
+        """ remove the unit standing on the province `pid` and return it """
+        unit = self.units[pid]
+
+        if unit is not None:
+            owner = int(self.owner[pid])
+            self.hash ^= self.zobrist.key(unit.loc.id, unit.unit_type, owner)
+            self.unit_count[owner] -= 1
+
+        self.unit_type[pid] = EMPTY
+        self.owner[pid] = EMPTY
+        self.coast[pid] = EMPTY
+        self.units[pid] = None
+        self.dirty.add(pid)
+        return unit
+
+    def occupied(self) -> np.ndarray:
+        """ return the ids of all the occupied provinces """
+        return np.flatnonzero(self.unit_type != EMPTY)
+
+    def get_units(self, owner: Optional[int] = None) -> List['Unit']:
+        """ return all the units on the board or only the ones owned by `owner` """
+        units = self.units
+
+        if owner is None:
+            return [units[i] for i in self.occupied()]
+
+        return [units[i] for i in np.flatnonzero(self.owner == owner)]
+
+    def copy(self) -> 'BoardState':
+        """ copy the placement, Unit objects are shared between the copies """
+        state = BoardState.__new__(BoardState)
+        state.unit_type = self.unit_type.copy()
+        state.owner = self.owner.copy()
+        state.coast = self.coast.copy()
+        state.units = list(self.units)
+        state.hash = self.hash
+        state.zobrist = self.zobrist
+        # forks start with an empty cache so there is nothing to invalidate
+        state.dirty = set()
+        state.unit_count = list(self.unit_count)
+        state.center_owner = self.center_owner.copy()
+        state.center_count = list(self.center_count)
+        return state
+
+    def set_center_owners(self, pids: List[int], owners: List[int]):
+        """ give the supply centers `pids` to `owners` and update the center counts """
+        center_owner = self.center_owner
+        count = self.center_count
+
+        for pid, owner in zip(pids, owners):
+            old = int(center_owner[pid])
+
+            if old == owner:
+                continue
+
+            if old != EMPTY:
+                count[old] -= 1
+
+            if owner != EMPTY:
+                count[owner] += 1
+
+            center_owner[pid] = owner
+
+    def clear(self):
+        self.dirty.update(self.occupied().tolist())
+        self.unit_type.fill(EMPTY)
+        self.owner.fill(EMPTY)
+        self.coast.fill(EMPTY)
+        self.units = [None] * len(self.units)
+        self.hash = 0
+        self.unit_count = [0] * MAX_OWNERS
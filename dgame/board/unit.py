@@ -1,28 +1,33 @@
 from dgame.province import Province
 from dgame.power import Player
 from dgame.order import Order
-from dgame.order import move, hold, support, support_move, convoy, convoy_move, build, disband
-from dgame.order import CONVOY_MOVE
+from dgame.order import move, hold, support, support_move, convoy, convoy_move, retreat, build, disband
+from dgame.order import CONVOY_MOVE, CONVOY, SUPPORT_MOVE, OrderTypes
+from dgame.board.phase import RETREATS
 
 from enum import IntEnum, unique
-from typing import Set, List, Dict
-from dgame.ImmutableList import nil
+from typing import Set, List, Dict, Iterable, Iterator
+
+# kinds of the per unit entries stored in the board cache
+REACHABLE_TILES = 'reachable_tiles'
+MOVE_ORDERS = 'move_orders'
 
 
 class Context:
 
-    def __init__(self):
+    def __init__(self, board: 'Board' = None):
+        # [immutable] Board we are computing the orders for; forked boards share their units
+        # so `unit.board` might point to the board the unit was created on
+        self.board = board
+
         # [mutable] Cache of all the reachable tile per units
         self.reachable_tiles = {}
 
-        # [immutable] Path we are currently exploring
-        self.path = nil()
-
         # [mutable] Save all the move orders for later
         self.move_orders = {}
 
-        # [immutable] are we inside a convoy path
-        # is_convoy = False
+        # [lazy] fleet chains of the board (see `_fleet_chains`)
+        self.fleet_chains = None
 
 
 @unique
@@ -54,136 +59,176 @@ class Unit:
 
     def get_possible_move_order(self, other_orders=None, context: Context =None) -> Dict[Province, Set[Order]]:
         """ All possible order during the move phase """
-        tiles = self.reachable_tiles(context)
         ncloc = self.loc.without_coast
-
-        orders = {hold(self)}
+        unit_orders, convoys, moves = self.move_orders(context)
 
         if other_orders is None:
-            other_orders = {ncloc: orders}
-        else:
-            orders = other_orders.get(ncloc)
-
-            if orders is None:
-                orders = set()
-                other_orders[ncloc] = orders
+            other_orders = {}
 
-            orders.add(hold(self))
-
-        def append_move_order(tile, order):
-            loc_nc = tile.without_coast
-
-            if loc_nc not in context.move_orders:
-                context.move_orders[loc_nc] = set()
+        orders = other_orders.get(ncloc)
+        if orders is None:
+            other_orders[ncloc] = set(unit_orders)
+        else:
+            orders.update(unit_orders)
 
-            context.move_orders[loc_nc].add(order)
+        for loc, order in convoys:
+            s = other_orders.get(loc)
+            if s is None:
+                other_orders[loc] = {order}
+            else:
+                s.add(order)
 
-        # first we establish where can a unit move
-        # then given that information we can check where multiple units can move to the same location and add the
-        # support move order
+        for loc_nc, order in moves:
+            s = context.move_orders.get(loc_nc)
+            if s is None:
+                context.move_orders[loc_nc] = {order}
+            else:
+                s.add(order)
 
-        def make_convoy_path(path):
-            # first element is original loc
-            ite = iter(path)
+        return other_orders
 
-            for count, loc in enumerate(ite):
-                if count == size - 1:
-                    break
+    def move_orders(self, context: Context):
+        """ orders of the unit, convoy orders given to the fleets on its paths and move orders by destination;
+            the tuple is cached on the board until the provinces it depends on change """
+        board = context.board or self.board
 
-                fleet = self.board.get_unit_at(loc)
+        cached = board.get_cached(MOVE_ORDERS, self)
+        if cached is None:
+            cached = board.set_cached(MOVE_ORDERS, self, self._make_move_orders(board, context), self._dependencies(context))
 
-                if fleet is None:
-                    break
+        return cached
 
-                ncloc = fleet.loc.without_coast
-                order = convoy(self.board.get_unit_at(loc), self, dest=tile)
+    def _make_move_orders(self, board: 'Board', context: Context):
+        tiles = self.reachable_tiles(context)
+        units = board.state.units
 
-                s = other_orders.get(ncloc)
-                if s is None:
-                    other_orders[ncloc] = {order}
-                else:
-                    s.add(order)
+        orders = {hold(self)}
+        convoys = []
+        moves = []
 
+        # first we establish where can a unit move
+        # then given that information we can check where multiple units can move to the same location and add the
+        # support move order
         for tile, paths in tiles.items():
-            if tile is self.loc:
-                continue
-
             for path in paths:
-                sup_unit = self.board.get_unit_at(tile)
-                size = len(path)
-
                 # we are not convoying / the tile is adjacent
-                if size == 1:
+                if len(path) == 1:
                     order = move(self, dest=tile)
                     orders.add(order)
-                    append_move_order(tile, order)
+                    moves.append((tile.without_coast, order))
 
-                # we are convoying to destination
-                elif tile is not self.loc:
-                    path2 = self.board.is_convoy_paths(self.loc, size - 1, tile)
+                    # Support the unit we can reach if we can reach it without convoy
+                    sup_unit = board.get_unit_at(tile)
+                    if sup_unit is not None:
+                        orders.add(support(self, target=sup_unit))
 
-                    if path2 is not None:
-                        order = convoy_move(self, tile, path=path)
-                        orders.add(order)
-                        append_move_order(tile, order)
+                # we are convoying to destination, every fleet of the path convoys us
+                else:
+                    order = convoy_move(self, tile, path=path)
+                    orders.add(order)
+                    moves.append((tile.without_coast, order))
 
-                        make_convoy_path(path)
+                    for loc in path[:-1]:
+                        convoys.append((loc, convoy(units[loc.id], self, dest=tile)))
 
-                # Support the unit we can reach if we can reach it without convoy
-                if sup_unit is not None and size == 1:
-                    # we cannot support a unit that convoys us
-                    orders.add(support(self, target=sup_unit))
+        return frozenset(orders), convoys, moves
 
-        return other_orders
+    def _dependencies(self, context: Context) -> Set[int]:
+        """ provinces whose occupation can change the orders of the unit;
+            its neighbours and for armies the neighbours of the fleet chains next to it """
+        board = context.board or self.board
+        adjacency = board.map_index.adjacency
+        pid = self.loc.without_coast.id
+
+        provinces = {pid}
+        provinces.update(adjacency[pid])
+
+        if not self.is_fleet:
+            chain_of, chains, _ = _get_fleet_chains(context, board)
+
+            for index in _touched_chains(self.loc, chain_of, board):
+                for fleet in chains[index]:
+                    provinces.update(adjacency[fleet])
+
+        return provinces
 
     def reachable_tiles(self, context: Context):
+        """ {tile: paths} where a path is the fleets convoying the unit followed by the unit location;
+            (loc,) is a move without convoy. Army destinations are merged with their coasts BUL/EC, BUL/SC => BUL """
         if self in context.reachable_tiles:
             return context.reachable_tiles[self]
 
-        reachable = {}
-        self._reachable_tiles(False, nil().append(self.loc), reachable)
+        board = context.board or self.board
+        reachable = board.get_cached(REACHABLE_TILES, self)
 
-        # remove coasts BUL/EC, BUL/SC => BUL
-        if not self.is_fleet:
+        if reachable is None:
+            direct = (self.loc,)
             reachable = {
-                k.without_coast: tuple(v) for k, v in reachable.items()
+                tile: [direct] for tile in board.map_index.unit_adjacency[self.unit_type][self.loc.id]
             }
-        else:
+
+            if not self.is_fleet:
+                self._convoy_paths(reachable, _get_fleet_chains(context, board), board)
+
             reachable = {
                 k: tuple(v) for k, v in reachable.items()
             }
 
+            board.set_cached(REACHABLE_TILES, self, reachable, self._dependencies(context))
+
         context.reachable_tiles[self] = reachable
         return reachable
 
-    def _reachable_tiles(self, convoy_: bool, path: List[Province], reachable: Set[Province]) -> Set[Province]:
-        """ Compute all the reachable tiles for a given unit.
-            This take into account all the adjacent land tiles and all the land tiles accessible through convoys """
-        # reachable = set()
+    def _convoy_paths(self, reachable: Dict[Province, List], fleet_chains, board: 'Board'):
+        """ add the convoy paths of the army to `reachable`.
+            The army can be convoyed to the coasts next to the fleet chains touching it; the fleets of the paths are
+            the minimal paths of the convoy table made only of fleets of those chains """
+        chain_of, chains, masks = fleet_chains
+        touched = _touched_chains(self.loc, chain_of, board)
 
-        # For each tile check if they are accessible
-        for tile in self.loc.neighbours:
-            if tile.is_water:
-                unit = self.board.get_unit_at(tile)
+        if not touched:
+            return
 
-                if unit is not None and unit.is_fleet and tile not in path:
-                    # There is a fleet on the tile so we might be able to convoy though fleet chains
-                    unit._reachable_tiles(convoy_=True, path=path.append(self.loc), reachable=reachable)
+        land_neighbours = board.map_index.land_neighbours
+        fleets = 0
+        dests = set()
 
-            else:
-                if tile not in path:
-                    if tile not in reachable:
-                        reachable[tile] = set()
-                    reachable[tile].add(path)
+        for index in touched:
+            fleets |= masks[index]
+
+            for pid in chains[index]:
+                dests.update(tile.without_coast for tile in land_neighbours[pid])
+
+        dests.discard(self.loc)
+        table = board.map_index.convoys
+
+        for dest in dests:
+            lengths = table.lengths(self.loc.id, dest.id)
 
+            # paths longer than the table maximum length
+            if lengths is None:
+                continue
+
+            for path_masks in lengths.values():
+                for mask in path_masks:
+                    if not mask & ~fleets:
+                        reachable.setdefault(dest, []).append(table.fleets(mask) + (self.loc,))
+
+    def adjacent_tiles(self) -> List[Province]:
+        """ tiles the unit can move to without being convoyed """
+        tiles = []
+        for tile in self.loc.neighbours:
+            tile = tile.without_coast
+
+            if not tile.is_water and tile not in tiles:
+                tiles.append(tile)
+
+        return tiles
 
     @property
     def is_fleet(self):
         return self.unit_type == UnitType.Fleet
 
-    def invalidate_cache(self):
-        self._reachable_tiles_cache = None
-
 
 class Army(Unit):
 
@@ -205,30 +250,12 @@ class Fleet(Unit):
     def __repr__(self):
         return 'F {}'.format(self.loc)
 
-    def _reachable_tiles(self, convoy_: bool, path: List[Province], reachable: Set[Province]) -> Set[Province]:
-        """ fleets can reach every tile that are adjacent """
-        # print(convoy_)
-
-        if not convoy_:
-            # return set(filter(lambda x: self.board.get_tile_by_id(x).is_water, self.loc.neighbours))
-            #reachable = set()
-
-            for tile in self.loc.neighbours:
-                # for a tile to be reachable by a fleet it needs to be either water
-                # or a land tile with a common sea between current loc and dest loc
-                has_common_sea = self.loc in tile.seas or len(self.loc.seas.intersection(tile.seas)) > 0
-
-                if (tile.is_water or has_common_sea) and tile not in path:
-                    if tile not in reachable:
-                        reachable[tile] = set()
-                    reachable[tile].add(path)
-
-                    # reachable.add((tile, path))
-
-            # reachable.discard((self.loc, any))
-            return reachable
-
-        super()._reachable_tiles(convoy_=True, path=path.append(self.loc), reachable=reachable)
+    def adjacent_tiles(self) -> List[Province]:
+        # water tiles and the land tiles with a common sea between current loc and dest loc
+        loc = self.loc
+        return [
+            tile for tile in loc.neighbours if tile.is_water or loc in tile.seas or len(loc.seas.intersection(tile.seas)) > 0
+        ]
 
 
 def make_unit(type: UnitType, loc: Province, owner: Player = None, board: 'Board' = None) -> Unit:
@@ -250,51 +277,343 @@ def get_all_possible_move_orders(board, context=None):
     other_orders = {}
 
     if context is None:
-        context = Context()
+        context = Context(board)
+
+    context.board = board
 
     for unit in board.units():
         unit.get_possible_move_order(other_orders, context)
 
+    _add_support_orders(other_orders, context)
+    return other_orders
+
+
+def iter_possible_orders(board, locs: Iterable[Province] = None, kinds: Set[OrderTypes] = None,
+                         context=None) -> Iterator[Order]:
+    """ Lazy version of `get_all_possible_move_orders`, yields the orders of the units one unit after the other.
+        `locs` limits the units to the ones on those provinces and `kinds` the order types; the support move
+        and convoy orders of a unit are only computed when they are asked for and only from the units moving
+        where the unit can move
+
+        >>> next(iter_possible_orders(board, kinds={HOLD, MOVE}))
+    """
+    if context is None:
+        context = Context(board)
+
+    context.board = board
+
+    if locs is None:
+        units = board.units()
+    else:
+        units = [unit for unit in map(board.get_unit_at, locs) if unit is not None]
+
+    # destination => move orders of every unit to the destination
+    moves_to = {}
+
+    for unit in units:
+        yield from _iter_unit_orders(unit, kinds, moves_to, context)
+
+
+def get_possible_orders_at(board, province: Province, context=None) -> Set[Order]:
+    """ possible orders of the unit on a province, same as `get_all_possible_move_orders(board)[province]`
+        without computing the orders of the units that cannot support, convoy or be convoyed by it.
+        During a retreat phase the orders of the unit dislodged from the province """
+    pid = province.without_coast.id
+
+    if board.phase.kind == RETREATS:
+        dislodged = board.dislodged.get(pid)
+
+        if dislodged is None:
+            return set()
+
+        return get_all_possible_retreat_orders(board, {pid: dislodged}).get(province.without_coast, set())
+
+    return set(iter_possible_orders(board, (province,), context=context))
+
+
+def _iter_unit_orders(unit: Unit, kinds, moves_to, context: Context) -> Iterator[Order]:
+    unit_orders, _, moves = unit.move_orders(context)
+    seen = set()
+
+    for order in unit_orders:
+        if kinds is None or order.order in kinds:
+            seen.add(order)
+            yield order
+
+    # convoy orders are made by the armies next to the fleet chain of the unit
+    if unit.loc.is_water and (kinds is None or CONVOY in kinds):
+        for army in _convoyed_armies(unit, context):
+            for loc, order in army.move_orders(context)[1]:
+                if loc.id == unit.loc.id and order not in seen:
+                    seen.add(order)
+                    yield order
+
+    if kinds is not None and SUPPORT_MOVE not in kinds:
+        return
+
+    # only units moving without convoy can support
+    for dest in {dest for dest, order in moves if order.path is None}:
+        orders = moves_to.get(dest)
+
+        if orders is None:
+            orders = _moves_to(dest, context)
+            moves_to[dest] = orders
+
+        for _, order in _support_orders(dest, orders, supporter=unit):
+            # convoy orders of the fleets of a convoy path are already made by the army
+            if order.order is SUPPORT_MOVE and order not in seen:
+                seen.add(order)
+                yield order
+
+
+def _convoyed_armies(fleet: Unit, context: Context) -> Iterator[Unit]:
+    """ armies next to the fleet chain of a fleet """
+    board = context.board
+    units = board.state.units
+    adjacency = board.map_index.adjacency
+    chain_of, chains, _ = _get_fleet_chains(context, board)
+
+    provinces = set()
+    for pid in chains[chain_of[fleet.loc.id]]:
+        provinces.update(adjacency[pid])
+
+    for pid in provinces:
+        unit = units[pid]
+
+        if unit is not None and not unit.is_fleet:
+            yield unit
+
+
+def _moves_to(dest_nc: Province, context: Context) -> List[Order]:
+    """ move orders of every unit to a province (without coast); the units of `MapIndex.movers`
+        and the armies next to the fleet chains touching it """
+    board = context.board
+    units = board.state.units
+    adjacency = board.map_index.adjacency
+    chain_of, chains, _ = _get_fleet_chains(context, board)
+
+    movers = set()
+    for unit_type, tile in board.map_index.movers[dest_nc.id]:
+        unit = units[tile.without_coast.id]
+
+        if unit is not None and unit.unit_type == unit_type and unit.loc is tile:
+            movers.add(unit)
+
+    for index in {chain_of[pid] for pid in adjacency[dest_nc.id] if pid in chain_of}:
+        for pid in chains[index]:
+            for n in adjacency[pid]:
+                unit = units[n]
+
+                if unit is not None and not unit.is_fleet:
+                    movers.add(unit)
+
+    orders = []
+    for unit in movers:
+        orders.extend(order for dest, order in unit.move_orders(context)[2] if dest is dest_nc)
+
+    return orders
+
+
+def get_possible_move_orders_for_power(board, power: Player, context=None) -> Dict[Province, Set[Order]]:
+    """ Same as `get_all_possible_move_orders` restricted to the units of `power`.
+        Only the units of the power and the units whose orders can end up in theirs are visited;
+        the units moving where the power can move (supports) and the armies that can be convoyed by the fleet chains
+        touching the power (convoys) """
+    if context is None:
+        context = Context(board)
+
+    context.board = board
+    units = board.state.units
+    adjacency = board.map_index.adjacency
+
+    own = board.units_of(power)
+    if not own:
+        return {}
+
+    chain_of, chains, _ = _get_fleet_chains(context, board)
+
+    # provinces the power's units can move to, by land or through the fleet chains they are in or next to
+    dests = set()
+    touched = set()
+    for unit in own:
+        pid = unit.loc.without_coast.id
+        dests.update(adjacency[pid])
+
+        for n in adjacency[pid] | {pid}:
+            if n in chain_of:
+                touched.add(chain_of[n])
+
+    for index in touched:
+        for pid in chains[index]:
+            dests.update(adjacency[pid])
+
+    # armies convoyed to one of those destinations by the chains next to it
+    for pid in dests:
+        for n in adjacency[pid]:
+            if n in chain_of:
+                touched.add(chain_of[n])
+
+    # units next to a destination can support/move there, armies next to a chain can be convoyed by it
+    visit = {unit.loc.without_coast.id for unit in own}
+    for pid in dests:
+        visit.update(adjacency[pid])
+
+    for index in touched:
+        for pid in chains[index]:
+            visit.update(adjacency[pid])
+
+    other_orders = {}
+    for pid in visit:
+        unit = units[pid]
+
+        if unit is not None:
+            unit.get_possible_move_order(other_orders, context)
+
+    _add_support_orders(other_orders, context, power)
+
+    result = {}
+    for unit in own:
+        ncloc = unit.loc.without_coast
+        result[ncloc] = other_orders[ncloc]
+
+    return result
+
+
+def _fleet_chains(board):
+    """ fleet chains; water provinces occupied by fleets connected to each other.
+        Returns ({province id: chain index}, [province ids of the chain], [convoy table mask of the chain]) """
+    units = board.state.units
+    adjacency = board.map_index.adjacency
+    water_bit = board.map_index.convoys.water_bit
+
+    chain_of = {}
+    chains = []
+    masks = []
+    for unit in units:
+        if unit is None or not unit.loc.is_water or unit.loc.id in chain_of:
+            continue
+
+        chain = set()
+        mask = 0
+        pending = [unit.loc.id]
+        while pending:
+            pid = pending.pop()
+            if pid in chain_of:
+                continue
+
+            chain_of[pid] = len(chains)
+            chain.add(pid)
+            mask |= water_bit[pid]
+            for n in adjacency[pid]:
+                fleet = units[n]
+                if fleet is not None and fleet.loc.is_water and n not in chain_of:
+                    pending.append(n)
+
+        chains.append(chain)
+        masks.append(mask)
+
+    return chain_of, chains, masks
+
+
+def _get_fleet_chains(context: Context, board):
+    if context.fleet_chains is None:
+        context.fleet_chains = _fleet_chains(board)
+
+    return context.fleet_chains
+
+
+def _touched_chains(loc: Province, chain_of, board) -> Set[int]:
+    """ index of the fleet chains next to a province """
+    return {chain_of[tile.id] for tile in board.map_index.water_neighbours[loc.id] if tile.id in chain_of}
+
+
+def _add_support_orders(other_orders, context: Context, power: Player = None):
+    """ add the support move orders (and convoys of convoyed moves) of the units moving to the same province;
+        when `power` is set only the orders of its units are added """
     # no coast destination so we can unify fleet on coast and army supporting that fleet
     for dest_nc, orders in context.move_orders.items():
+        for unit, order in _support_orders(dest_nc, orders, power):
+            other_orders[unit.loc.without_coast].add(order)
 
-        for o1 in orders:
-            unit = o1.unit
-            corder = other_orders[unit.loc.without_coast]
-
-            for o2 in orders:
-                if o1 is o2:
-                    continue
-                if o1.unit is o2.unit:
-                    continue
-                elif o1.order == CONVOY_MOVE or o2.order == CONVOY_MOVE:
-                    # in a `convoy move` the move (o2.unit) can be supported
-                    # but the one doing the move cannot support
-                    # i.e o1 has to be
-
-                    # F HOL S A YOR - BEL  (A YOR - BEL VIA NTH)
-                    # but A YOR S F HOL - BEL is not possible
-                    if o1.path is None and o2.path is not None:
-                        target = o2.unit
-
-                        # unit cannot support AND convoy
-                        if unit.loc not in o2.path:
-                            order = support_move(unit, target=target, dest=o2.dest)
-                            corder.add(order)
-                        else:  # Duplicate ?
-                            order = convoy(unit, target, dest=o2.dest)
-                            corder.add(order)
-                            #print(order, set(map(lambda x: str(x), o2.path)))
-                else:
+
+def _support_orders(dest_nc: Province, orders, power: Player = None, supporter: Unit = None):
+    """ yield (unit, order) for the support move orders between the move orders to `dest_nc`;
+        when `supporter` is set only its orders are yielded """
+    for o1 in orders:
+        unit = o1.unit
+
+        if power is not None and unit.owner is not power:
+            continue
+
+        if supporter is not None and unit is not supporter:
+            continue
+
+        for o2 in orders:
+            if o1 is o2:
+                continue
+            if o1.unit is o2.unit:
+                continue
+            elif o1.order == CONVOY_MOVE or o2.order == CONVOY_MOVE:
+                # in a `convoy move` the move (o2.unit) can be supported
+                # but the one doing the move cannot support
+                # i.e o1 has to be
+
+                # F HOL S A YOR - BEL  (A YOR - BEL VIA NTH)
+                # but A YOR S F HOL - BEL is not possible
+                if o1.path is None and o2.path is not None:
                     target = o2.unit
-                    corder.add(support_move(unit, target=target, dest=o2.dest))
 
-                    # http://web.inter.nl.net/users/L.B.Kruijswijk/#6.B
-                    # 6.B.8 SUPPORTING WITH UNSPECIFIED COAST WHEN ONLY ONE COAST IS POSSIBLE
-                    if o2.dest is not dest_nc:
-                        corder.add(support_move(unit, target=target, dest=dest_nc))
+                    # unit cannot support AND convoy
+                    if unit.loc not in o2.path:
+                        yield unit, support_move(unit, target=target, dest=o2.dest)
+                    else:  # Duplicate ?
+                        yield unit, convoy(unit, target, dest=o2.dest)
+            else:
+                target = o2.unit
+                yield unit, support_move(unit, target=target, dest=o2.dest)
 
-    return other_orders
+                # http://web.inter.nl.net/users/L.B.Kruijswijk/#6.B
+                # 6.B.8 SUPPORTING WITH UNSPECIFIED COAST WHEN ONLY ONE COAST IS POSSIBLE
+                if o2.dest is not dest_nc:
+                    yield unit, support_move(unit, target=target, dest=dest_nc)
+
+
+def retreat_tiles(board, unit: Unit, attacker: int, contested: Set[int] = None) -> Iterator[Province]:
+    """ tiles a dislodged unit can retreat to; the empty provinces next to it except the one
+        its attacker came from and the ones left empty by a standoff (`contested`) """
+    if contested is None:
+        contested = board.contested
+
+    units = board.state.units
+
+    for tile in board.map_index.unit_adjacency[unit.unit_type][unit.loc.id]:
+        pid = tile.without_coast.id
+
+        if units[pid] is None and pid != attacker and pid not in contested:
+            yield tile
+
+
+def get_all_possible_retreat_orders(board, dislodged=None, contested=None) -> Dict[Province, Set[Order]]:
+    """ Retreat and disband orders of the dislodged units.
+        A unit cannot retreat to an occupied province, to the province its attacker came from
+        or to a province left empty by a standoff (`contested`).
+        Units that cannot retreat anywhere are disbanded automatically and get no orders """
+    if dislodged is None:
+        dislodged = board.dislodged
+
+    if contested is None:
+        contested = board.contested
+
+    orders = {}
+
+    for unit, attacker in dislodged.values():
+        unit_orders = {disband(unit)}
+        unit_orders.update(retreat(unit, tile) for tile in retreat_tiles(board, unit, attacker, contested))
+
+        if len(unit_orders) > 1:
+            orders[unit.loc.without_coast] = unit_orders
+
+    return orders
 
 
 def test():
@@ -316,8 +635,7 @@ def test():
 
         board.process_order(austria, disband(unit))
 
-        assert len(players[0].units) == 0
-        assert len(board._loc_unit) == 0
+        assert len(board.units_of(players[0])) == 0
         assert len(board.units()) == 0
 
     # -------------------------------------------------------------------------------
@@ -345,8 +663,7 @@ def test():
     board.process_order(players[0], disband(a1))
     board.process_order(players[0], disband(f1))
 
-    assert len(players[0].units) == 0
-    assert len(board._loc_unit) == 0
+    assert len(board.units_of(players[0])) == 0
     assert len(board.units()) == 0
 
 
@@ -0,0 +1,250 @@
+"""
+    Array version of `get_all_possible_move_orders`.
+
+    Every order is a row of 4 integers (order type, unit tile id, destination tile id, target unit tile id),
+    columns that do not apply are set to -1. Units are identified by the tile they stand on (STP/NC for a fleet
+    on the north coast of STP). The orders of all the units are computed at once from adjacency matrices
+    precomputed per map and the occupancy arrays of `BoardState`.
+
+    >>> codes = get_all_possible_move_order_codes(board)
+    >>> codes[codes[:, ORDER] == SUPPORT_MOVE]
+
+    The rows can also be packed into the integers of `dgame.order.encode`
+
+    >>> get_all_possible_move_order_codes(board, packed=True)
+"""
+import numpy as np
+
+from dgame.board.state import EMPTY
+from dgame.board.unit import ARMY, FLEET
+from dgame.order import Order, hold, move, convoy_move, convoy, support, support_move
+from dgame.order import HOLD, MOVE, CONVOY_MOVE, CONVOY, SUPPORT, SUPPORT_MOVE
+from dgame.order import UNIT_TYPE_SHIFT, UNIT_SHIFT, DEST_SHIFT, TARGET_TYPE_SHIFT, TARGET_SHIFT
+from dgame.province import Province
+
+from typing import Dict, Set
+from weakref import WeakKeyDictionary
+
+# columns of an order row
+ORDER = 0
+UNIT = 1
+DEST = 2
+TARGET = 3
+
+# tables of every map index used by the process
+_tables = WeakKeyDictionary()
+
+
+class OrderTables:
+    """
+        Immutable matrices derived from a map index, indexed by [unit type, unit tile id, ...]
+
+        moves        : tiles the unit can move to without convoy
+        reach        : provinces (without coast) the unit can move to; i.e the provinces it can support
+        reached      : `reach` indexed by [province id, unit type, unit tile id]
+        support_dests: destinations the unit can be supported to; its moves and the province of the coasts it
+                       can move to (6.B.8 support with unspecified coast)
+
+        convoy_start, convoy_dest, convoy_mask: convoy paths, one row per (army province, destination, fleets)
+        water_bit: bit of the water provinces in the convoy masks
+        static_rows: [unit type][tile id] => hold and move orders of the unit
+    """
+    __slots__ = ('size', 'tile_province', 'moves', 'reach', 'reached', 'support_dests', 'convoy_start', 'convoy_dest',
+                 'convoy_mask', 'water_bit', 'water', 'static_rows', '__weakref__')
+
+    def __init__(self, map_index: 'MapIndex'):
+        size = map_index.size
+        provinces = map_index.provinces
+
+        self.size = size
+        self.tile_province = np.array([p.without_coast.id for p in provinces], dtype=np.intp)
+
+        self.moves = np.zeros((2, size, size), dtype=bool)
+        for unit_type in (ARMY, FLEET):
+            for loc, tiles in enumerate(map_index.unit_adjacency[unit_type]):
+                self.moves[unit_type, loc, [tile.id for tile in tiles]] = True
+
+        self.reach = np.zeros((2, size, size), dtype=bool)
+        self.support_dests = self.moves.copy()
+
+        types, locs, tiles = np.nonzero(self.moves)
+        self.reach[types, locs, self.tile_province[tiles]] = True
+        self.support_dests[types, locs, self.tile_province[tiles]] = True
+        self.reached = np.ascontiguousarray(self.reach.transpose(2, 0, 1))
+
+        # grouped by (start, dest)
+        rows = map_index.convoys.to_array()
+        rows = rows[np.lexsort((rows[:, 1], rows[:, 0]))]
+        self.convoy_start = rows[:, 0].astype(np.intp)
+        self.convoy_dest = rows[:, 1].astype(np.intp)
+        self.convoy_mask = rows[:, 3]
+
+        self.water = np.array([p.id for p in map_index.convoys.water], dtype=np.intp)
+        self.water_bit = np.array(map_index.convoys.water_bit, dtype=np.uint64)
+
+        # hold and move orders of every unit
+        self.static_rows = []
+        for unit_type in (ARMY, FLEET):
+            rows = []
+            for loc in range(size):
+                tiles = np.flatnonzero(self.moves[unit_type, loc])
+                rows.append(np.concatenate((_rows(HOLD, [loc], -1, -1), _rows(MOVE, [loc] * len(tiles), tiles, -1))))
+
+            self.static_rows.append(rows)
+
+
+def get_order_tables(map_index: 'MapIndex') -> OrderTables:
+    """ return the tables of a map index, building them the first time """
+    tables = _tables.get(map_index)
+
+    if tables is None:
+        tables = OrderTables(map_index)
+        _tables[map_index] = tables
+
+    return tables
+
+
+def _rows(kind, unit, dest, target) -> np.ndarray:
+    rows = np.empty((len(unit), 4), dtype=np.int16)
+    rows[:, ORDER] = kind
+    rows[:, UNIT] = unit
+    rows[:, DEST] = dest
+    rows[:, TARGET] = target
+    return rows
+
+
+def get_all_possible_move_order_codes(board, packed=False) -> np.ndarray:
+    """ every possible order of the movement phase as an (n, 4) array without duplicates;
+        or as an (n,) uint64 array of packed orders (see `pack_orders`) """
+    rows = _move_order_rows(board)
+
+    if packed:
+        return pack_orders(board, rows)
+
+    return rows
+
+
+def _move_order_rows(board) -> np.ndarray:
+    tables = get_order_tables(board.map_index)
+    state = board.state
+
+    occupied = state.unit_type != EMPTY
+    pids = np.flatnonzero(occupied)
+    locs = state.coast[pids].astype(np.intp)
+    types = state.unit_type[pids].astype(np.intp)
+    count = len(pids)
+
+    if count == 0:
+        return np.empty((0, 4), dtype=np.int16)
+
+    # holds and moves only depend on the unit
+    static = tables.static_rows
+    parts = [static[t][loc] for t, loc in zip(types.tolist(), locs.tolist())]
+
+    # support hold of the units on the provinces we can move to
+    reach = tables.reach[types, locs]
+    unit, province = np.divmod(np.flatnonzero(reach & occupied), tables.size)
+    parts.append(_rows(SUPPORT, locs[unit], -1, state.coast[province]))
+
+    # support move; every unit able to move to the province a unit is moving to can support it
+    movers = tables.support_dests[types, locs]
+    mover, tile = np.divmod(np.flatnonzero(movers), tables.size)
+    reached = tables.reached[:, types, locs]
+    move_index, supporter = np.divmod(np.flatnonzero(reached[tables.tile_province[tile]]), count)
+
+    mover = mover[move_index]
+    keep = supporter != mover
+    parts.append(_rows(SUPPORT_MOVE, locs[supporter[keep]], tile[move_index[keep]], locs[mover[keep]]))
+
+    # convoys; paths starting from an army with a fleet on every water province
+    # only fleets stand on water and provinces are unique so the sum of the bits is the mask of all the fleets
+    fleets = tables.water_bit[pids].sum()
+    candidates = ()
+
+    if fleets:
+        candidates = np.flatnonzero((tables.convoy_mask & ~fleets) == 0)
+        candidates = candidates[state.unit_type[tables.convoy_start[candidates]] == ARMY]
+
+    if len(candidates):
+        start = tables.convoy_start[candidates]
+        dest = tables.convoy_dest[candidates]
+        mask = tables.convoy_mask[candidates]
+
+        # rows are grouped by (start, dest)
+        key = start * tables.size + dest
+        first = np.flatnonzero(np.concatenate(([True], key[1:] != key[:-1])))
+        used = np.bitwise_or.reduceat(mask, first)
+        required = np.bitwise_and.reduceat(mask, first)
+        start = start[first]
+        dest = dest[first]
+        parts.append(_rows(CONVOY_MOVE, start, dest, -1))
+
+        # the fleets of every path get a convoy order
+        water = len(tables.water)
+        bits = (used[:, None] >> np.arange(water, dtype=np.uint64)) & np.uint64(1)
+        path, fleet = np.divmod(np.flatnonzero(bits), water)
+        parts.append(_rows(CONVOY, tables.water[fleet], dest[path], start[path]))
+
+        # units able to move to the destination can support the convoyed army unless they are part of
+        # every path to it (they would be convoying) or they already support its move over land
+        army = np.searchsorted(pids, start)
+        supporting = reach[:, dest] & ((tables.water_bit[locs][:, None] & required[None, :]) == 0)
+        supporting[army, np.arange(len(start))] = False
+        supporting &= ~movers[army, dest]
+
+        unit, path = np.divmod(np.flatnonzero(supporting), len(start))
+        parts.append(_rows(SUPPORT_MOVE, locs[unit], dest[path], start[path]))
+
+    return np.concatenate(parts)
+
+
+def pack_orders(board, codes: np.ndarray) -> np.ndarray:
+    """ convert order rows to the integers of `dgame.order.encode`, the units must be on the board """
+    tile_province = get_order_tables(board.map_index).tile_province
+    unit_type = board.state.unit_type.astype(np.uint64)
+    codes = codes.astype(np.int64)
+    target = codes[:, TARGET]
+    target_type = np.where(target >= 0, unit_type[tile_province[target]], 0).astype(np.uint64)
+
+    # missing tiles are -1 so the stored id + 1 is 0
+    packed = codes[:, ORDER].astype(np.uint64)
+    packed |= unit_type[tile_province[codes[:, UNIT]]] << np.uint64(UNIT_TYPE_SHIFT)
+    packed |= (codes[:, UNIT] + 1).astype(np.uint64) << np.uint64(UNIT_SHIFT)
+    packed |= (codes[:, DEST] + 1).astype(np.uint64) << np.uint64(DEST_SHIFT)
+    packed |= target_type << np.uint64(TARGET_TYPE_SHIFT)
+    packed |= (target + 1).astype(np.uint64) << np.uint64(TARGET_SHIFT)
+    return packed
+
+
+def decode_orders(board, codes: np.ndarray) -> Dict[Province, Set[Order]]:
+    """ convert order rows to `Order` grouped by unit province like `get_all_possible_move_orders`;
+        convoyed moves are decoded without their path """
+    provinces = board.map_index.provinces
+    units = board.state.units
+    tile_province = get_order_tables(board.map_index).tile_province
+    orders = {}
+
+    for kind, loc, dest, target in codes.tolist():
+        unit = units[tile_province[loc]]
+
+        if kind == HOLD:
+            order = hold(unit)
+        elif kind == MOVE:
+            order = move(unit, provinces[dest])
+        elif kind == CONVOY_MOVE:
+            order = convoy_move(unit, provinces[dest])
+        elif kind == CONVOY:
+            order = convoy(unit, units[tile_province[target]], provinces[dest])
+        elif kind == SUPPORT:
+            order = support(unit, units[tile_province[target]])
+        else:
+            order = support_move(unit, units[tile_province[target]], provinces[dest])
+
+        ncloc = unit.loc.without_coast
+        s = orders.get(ncloc)
+        if s is None:
+            orders[ncloc] = {order}
+        else:
+            s.add(order)
+
+    return orders
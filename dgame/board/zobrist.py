@@ -0,0 +1,90 @@
+from collections import OrderedDict
+from random import Random
+from typing import Any, Optional
+
+# number of owners supported by the keys table; owner indices are stored as int8 in the board state
+MAX_OWNERS = 32
+
+_keys = {}
+
+
+class ZobristKeys:
+    """
+        Random 64 bits keys for every (province id, unit type, owner) triple.
+        The hash of a position is the xor of the keys of every unit on the board
+        which means it can be updated in O(1) when a unit is placed or removed.
+
+        Keys are generated from a fixed seed so the hashes are the same across processes.
+    """
+    __slots__ = ('keys', 'size')
+
+    def __init__(self, size: int, seed: int = 0x5eed):
+        rng = Random(seed)
+        self.size = size
+        self.keys = [rng.getrandbits(64) for _ in range(size * 2 * MAX_OWNERS)]
+
+    def key(self, pid: int, unit_type: int, owner: int) -> int:
+        return self.keys[(pid * 2 + unit_type) * MAX_OWNERS + owner]
+
+
+def get_zobrist_keys(size: int) -> ZobristKeys:
+    """ keys only depend on the number of provinces so boards of the same map share the same table """
+    keys = _keys.get(size)
+
+    if keys is None:
+        keys = ZobristKeys(size)
+        _keys[size] = keys
+
+    return keys
+
+
+class TranspositionTable:
+    """
+        Bounded cache mapping position hashes to computed results (possible orders, evaluations...).
+        When the table is full the least recently used entry is evicted.
+
+        >>> table = TranspositionTable(4096)
+        >>> orders = table.get(board.zobrist_hash)
+        >>> if orders is None:
+        >>>     orders = table.put(board.zobrist_hash, get_all_possible_move_orders(board))
+    """
+
+    def __init__(self, capacity: int = 65536):
+        self.capacity = capacity
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: int, default: Optional[Any] = None) -> Any:
+        entries = self._entries
+
+        try:
+            value = entries[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key: int, value: Any) -> Any:
+        entries = self._entries
+        entries[key] = value
+        entries.move_to_end(key)
+
+        if len(entries) > self.capacity:
+            entries.popitem(last=False)
+
+        return value
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
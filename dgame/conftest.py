@@ -0,0 +1,51 @@
+import glob
+import json
+import os
+
+import diplomacy
+import pytest
+from diplomacy import Game
+
+from dgame.board.board import Board
+from dgame.board.definition import BoardDefinitionFile
+from dgame.power import Player
+
+DIPLOMACY = os.path.dirname(diplomacy.__file__)
+STANDARD_MAP = os.path.join(DIPLOMACY, 'maps', 'standard.map')
+REPLAYS = sorted(glob.glob(os.path.join(DIPLOMACY, 'tests', 'network', '*.json')))
+
+
+@pytest.fixture(scope='session')
+def standard_definition():
+    """ definition of the standard map shared by every test """
+    return BoardDefinitionFile(STANDARD_MAP)
+
+
+@pytest.fixture
+def make_board(standard_definition):
+    """ factory of empty boards of the standard map with its powers """
+    def make():
+        return Board(standard_definition, [Player(p) for p in standard_definition.initial_condition()])
+
+    return make
+
+
+@pytest.fixture
+def board(make_board):
+    """ board of the opening position """
+    board = make_board()
+    board.from_game_state(Game())
+    return board
+
+
+@pytest.fixture(scope='session')
+def saved_games():
+    """ games saved by the legacy engine tests """
+    assert REPLAYS, 'no saved games found in {}'.format(DIPLOMACY)
+    games = []
+
+    for file_name in REPLAYS:
+        with open(file_name, 'r') as game_file:
+            games.append(json.load(game_file))
+
+    return games
@@ -1,8 +1,8 @@
 import json
-from dgame.board import Board
-from dgame.definition import BoardDefinitionFile
+from dgame.board.board import Board
+from dgame.board.definition import BoardDefinitionFile
 from dgame.power import Player
-from dgame.unit import get_all_possible_move_orders, make_unit
+from dgame.board.unit import get_all_possible_move_orders, make_unit
 from dgame.order import build
 from dgame.order import hold, move, support_move, support, convoy_move, convoy, retreat, disband, build, waive
 
@@ -22,6 +22,12 @@ def parse_army(army, board):
     return board.get_unit_at(parse_loc(army[1:], board))
     # return make_unit(army[0], board.get_tile_by_name(parse_loc(army[1:])))
 
+
+def parse_dislodged(army, board):
+    """ during the retreat phase the orders are given to the dislodged units """
+    unit = board.get_dislodged_at(parse_loc(army[1:], board))
+    return unit if unit is not None else parse_army(army, board)
+
 # F STP/SC - BOT == A STP - BOT
 def parse_order(order: str, board):
     if ' S ' in order:
@@ -33,6 +39,15 @@ def parse_order(order: str, board):
         a, b = order.split(' S ')
         return support(parse_army(a, board), parse_army(b, board))
 
+    if ' C ' in order:
+        a, b = order.split(' C ')
+        b, c = b.split(' - ')
+        return convoy(parse_army(a, board), parse_army(b, board), parse_loc(c, board))
+
+    if ' R ' in order:
+        a, b = order.split(' R ')
+        return retreat(parse_dislodged(a, board), parse_loc(b, board))
+
     if 'VIA' in order:
         a, b = order.split(' - ')
         return convoy_move(parse_army(a, board), parse_loc(b, board))
@@ -41,18 +56,13 @@ def parse_order(order: str, board):
         a, b = order.split(' - ')
         return move(parse_army(a, board), parse_loc(b, board))
 
-    if ' C ' in order:
-        a, b = order.split(' C ')
-        b, c = b.split(' - ')
-        return convoy(parse_army(a, board), parse_army(b, board), parse_loc(c, board))
-
-    if ' B' in order:
+    if order.endswith(' B'):
         return build(parse_army(order[:-1], board))
 
-    if ' D' in order:
-        return disband(parse_army(order[:-1], board))
+    if order.endswith(' D'):
+        return disband(parse_dislodged(order[:-1], board))
 
-    if ' H' in order:
+    if order.endswith(' H'):
         return hold(parse_army(order[:-1], board))
 
     #if self.order is WAIVE:
@@ -154,7 +164,7 @@ class GameExecutor:
             orders = round['orders']
             results = round['results']
 
-            norders_pending = []
+            norders_pending = {}
 
             # Check if all the orders that are going to be executed were found
             for power, orders in orders.items():
@@ -184,33 +194,17 @@ class GameExecutor:
                     result = results[str(norder.unit)]
 
                     if not result:
-                        norders_pending.append((player, norder))
+                        norders_pending.setdefault(player, []).append(norder)
 
                     print('>> ORDER: {:>30} == {:<30} ==> {}'.format(order, str(norder), result))
 
                 self.old_game.set_orders(power, orders)
 
-            # need to sort orders in a way that can be executed
-            g = 0
-            while len(norders_pending) > 0:
-                failed = []
-
-                for p, o in norders_pending:
-                    try:
-                        self.new_game.process_order(p, o)
-                    except AssertionError:
-                        failed.append((p, o))
-                        print(p.power[0], o)
-
-                print('--')
-                norders_pending = failed
-                g += 1
-
-                assert g < 10
+            # the board orders the moves so they can be executed and invalidates its cache
+            self.new_game.process_orders(norders_pending)
 
             # All have been processed
             self.old_game.process()
-            self.new_game.invalidate_cache()
 
             if k >= 2:
                 break
@@ -15,9 +15,10 @@
 
 """
 
+from array import array
 from enum import IntEnum, unique
 from collections import namedtuple
-from typing import TypeVar
+from typing import Iterable, TypeVar
 
 from dgame.province import Province
 
@@ -126,3 +127,84 @@ def build(unit: Unit) -> Order:
 
 def waive() -> Order:
     return Order(order=WAIVE, unit=None, dest=None, target=None, path=None)
+
+
+# Orders packed in a single integer, tiles are stored as id + 1 so 0 means no tile (WAIVE, HOLD destination...)
+#   bits  0-3 : order type
+#   bit     4 : unit type (army 0, fleet 1)
+#   bits 5-14 : unit tile id + 1
+#   bits 15-24: destination tile id + 1
+#   bit    25 : target unit type
+#   bits 26-35: target tile id + 1
+TILE_BITS = 10
+TILE_MASK = (1 << TILE_BITS) - 1
+
+UNIT_TYPE_SHIFT = 4
+UNIT_SHIFT = 5
+DEST_SHIFT = UNIT_SHIFT + TILE_BITS
+TARGET_TYPE_SHIFT = DEST_SHIFT + TILE_BITS
+TARGET_SHIFT = TARGET_TYPE_SHIFT + 1
+
+
+def _encode_unit(unit: Unit, type_shift: int, tile_shift: int) -> int:
+    if unit is None:
+        return 0
+
+    return int(unit.unit_type) << type_shift | (unit.loc.id + 1) << tile_shift
+
+
+def encode(order: Order) -> int:
+    """ pack an order in an integer; the path of convoyed moves is not kept """
+    code = int(order.order) | _encode_unit(order.unit, UNIT_TYPE_SHIFT, UNIT_SHIFT)
+    code |= _encode_unit(order.target, TARGET_TYPE_SHIFT, TARGET_SHIFT)
+
+    if order.dest is not None:
+        code |= (order.dest.id + 1) << DEST_SHIFT
+
+    return code
+
+
+def encode_orders(orders: Iterable[Order]) -> array:
+    """ pack orders in an array of unsigned 64 bits integers """
+    return array('Q', map(encode, orders))
+
+
+def _decode_unit(kind: OrderTypes, unit_type: int, tile: int, board: 'Board') -> Unit:
+    from dgame.board.unit import make_unit
+
+    loc = board.get_tile_by_id(tile)
+
+    # the unit to build is not on the board yet, retreating units are not on the board anymore
+    unit = None
+    if kind is RETREAT or kind is DISBAND:
+        unit = board.get_dislodged_at(loc)
+
+    if unit is None and kind is not BUILD:
+        unit = board.get_unit_at(loc)
+
+    if unit is None:
+        unit = make_unit(unit_type, loc)
+
+    return unit
+
+
+def decode(code: int, board: 'Board') -> Order:
+    """ unpack an order; units are looked up on the board, convoyed moves are decoded without their path """
+    kind = OrderTypes(code & 0xF)
+    unit = None
+    dest = None
+    target = None
+
+    tile = code >> UNIT_SHIFT & TILE_MASK
+    if tile:
+        unit = _decode_unit(kind, code >> UNIT_TYPE_SHIFT & 1, tile - 1, board)
+
+    tile = code >> DEST_SHIFT & TILE_MASK
+    if tile:
+        dest = board.get_tile_by_id(tile - 1)
+
+    tile = code >> TARGET_SHIFT & TILE_MASK
+    if tile:
+        target = _decode_unit(kind, code >> TARGET_TYPE_SHIFT & 1, tile - 1, board)
+
+    return Order(order=kind, unit=unit, dest=dest, target=target, path=None)
@@ -0,0 +1,150 @@
+import random
+
+import pytest
+from diplomacy import Game
+
+from dgame.board.adjudicator import resolve_movement
+from dgame.executor import parse_order
+
+
+@pytest.fixture
+def adjudicate(make_board):
+    """ resolve a movement phase where every unit is given an order {power: ['A PAR - BUR', ...]} """
+    def resolve(orders):
+        board = make_board()
+        board.load_units({name: [' '.join(order.split()[:2]) for order in power_orders]
+                          for name, power_orders in orders.items()})
+
+        return resolve_movement(board, {
+            board.get_player(name): [parse_order(order, board) for order in power_orders]
+            for name, power_orders in orders.items()
+        })
+
+    return resolve
+
+
+def placement(resolution):
+    return {'{} {}'.format(unit.unit_type, loc) for unit, loc in resolution.placement.values()}
+
+
+def dislodged(resolution):
+    return {str(unit) for unit, _ in resolution.dislodged.values()}
+
+
+# DATC 6.C Circular movement
+def test_three_army_circular_movement(adjudicate):
+    resolution = adjudicate({'TURKEY': ['F ANK - CON', 'A CON - SMY', 'A SMY - ANK']})
+    assert placement(resolution) == {'F CON', 'A SMY', 'A ANK'}
+
+
+def test_three_army_circular_movement_with_support(adjudicate):
+    resolution = adjudicate({'TURKEY': ['F ANK - CON', 'A CON - SMY', 'A SMY - ANK', 'A BUL S F ANK - CON']})
+    assert placement(resolution) == {'F CON', 'A SMY', 'A ANK', 'A BUL'}
+
+
+def test_disrupted_three_army_circular_movement(adjudicate):
+    resolution = adjudicate({'TURKEY': ['F ANK - CON', 'A CON - SMY', 'A SMY - ANK', 'A BUL - CON']})
+    assert placement(resolution) == {'F ANK', 'A CON', 'A SMY', 'A BUL'}
+    assert not dislodged(resolution)
+
+
+def test_circular_movement_with_attacked_convoy(adjudicate):
+    resolution = adjudicate({
+        'AUSTRIA': ['A TRI - SER', 'A SER - BUL'],
+        'TURKEY': ['A BUL - TRI VIA', 'F AEG C A BUL - TRI', 'F ION C A BUL - TRI', 'F ADR C A BUL - TRI'],
+        'ITALY': ['F NAP - ION'],
+    })
+    assert {'A SER', 'A BUL', 'A TRI', 'F NAP'} <= placement(resolution)
+
+
+def test_disrupted_circular_movement_due_to_dislodged_convoy(adjudicate):
+    resolution = adjudicate({
+        'AUSTRIA': ['A TRI - SER', 'A SER - BUL'],
+        'TURKEY': ['A BUL - TRI VIA', 'F AEG C A BUL - TRI', 'F ION C A BUL - TRI', 'F ADR C A BUL - TRI'],
+        'ITALY': ['F NAP - ION', 'F TUN S F NAP - ION'],
+    })
+    assert {'A TRI', 'A SER', 'A BUL', 'F ION'} <= placement(resolution)
+    assert dislodged(resolution) == {'F ION'}
+
+
+def test_two_armies_with_two_convoys(adjudicate):
+    resolution = adjudicate({
+        'ENGLAND': ['F NTH C A LON - BEL', 'A LON - BEL VIA'],
+        'FRANCE': ['F ENG C A BEL - LON', 'A BEL - LON VIA'],
+    })
+    assert placement(resolution) == {'F NTH', 'A BEL', 'F ENG', 'A LON'}
+
+
+def test_disrupted_unit_swap(adjudicate):
+    resolution = adjudicate({
+        'ENGLAND': ['F NTH C A LON - BEL', 'A LON - BEL VIA'],
+        'FRANCE': ['F ENG C A BEL - LON', 'A BEL - LON VIA', 'A BUR - BEL'],
+    })
+    assert placement(resolution) == {'F NTH', 'A LON', 'F ENG', 'A BEL', 'A BUR'}
+
+
+# DATC 6.D.12 Supporting a foreign unit to dislodge own unit prohibited
+def test_support_to_dislodge_own_unit(adjudicate):
+    resolution = adjudicate({
+        'AUSTRIA': ['F TRI H', 'A VIE S A VEN - TRI'],
+        'ITALY': ['A VEN - TRI'],
+    })
+    assert placement(resolution) == {'F TRI', 'A VIE', 'A VEN'}
+    assert not dislodged(resolution)
+
+
+def test_support_to_dislodge_own_unit_with_convoy(adjudicate):
+    # the legacy engine counts the support when the move is convoyed
+    resolution = adjudicate({
+        'AUSTRIA': ['A TRI H', 'A VIE S A APU - TRI'],
+        'ITALY': ['A APU - TRI VIA', 'F ADR C A APU - TRI'],
+    })
+    assert placement(resolution) == {'A TRI', 'A VIE', 'A APU', 'F ADR'}
+    assert not dislodged(resolution)
+
+
+# DATC 6.F.14 Simple convoy paradox; the convoyed army does not cut the support (Szykman rule)
+def test_simple_convoy_paradox(adjudicate):
+    resolution = adjudicate({
+        'ENGLAND': ['F LON S F WAL - ENG', 'F WAL - ENG'],
+        'FRANCE': ['A BRE - LON VIA', 'F ENG C A BRE - LON'],
+    })
+    assert placement(resolution) == {'F LON', 'F ENG', 'A BRE'}
+    assert dislodged(resolution) == {'F ENG'}
+
+
+def test_random_games(make_board):
+    """ same placement and dislodged units as `Game.process` on random orders """
+    for seed in range(4):
+        rng = random.Random(seed)
+        game = Game()
+        board = make_board()
+
+        while not game.is_game_done and int(game.get_current_phase()[1:5]) < 1906:
+            phase = game.get_current_phase()
+            possible = game.get_all_possible_orders()
+            chosen = {}
+
+            for name in game.powers:
+                chosen[name] = [rng.choice(possible[loc]) for loc in game.get_orderable_locations(name) if possible[loc]]
+                game.set_orders(name, chosen[name])
+
+            resolution = None
+            if phase[-1] == 'M':
+                board.from_game_state(game)
+                resolution = resolve_movement(board, {
+                    board.get_player(name): [parse_order(order, board) for order in orders]
+                    for name, orders in chosen.items()
+                })
+
+            game.process()
+
+            if resolution is not None:
+                results = game.result_history.last_value()
+                expected = {unit for power in game.powers.values() for unit in power.units}
+                expected_dislodged = {
+                    unit for unit, result in results.items() if any(str(r) == 'dislodged' for r in result)
+                }
+
+                assert placement(resolution) == expected, (seed, phase)
+                assert dislodged(resolution) == expected_dislodged, (seed, phase)
@@ -48,7 +48,7 @@ def check_speed(g1, g2):
     import timeit
 
     def no_cache():
-        g2.invalidate_cache()
+        g2.clear_cache()
         get_all_possible_move_orders(g2)
 
     def refactored():
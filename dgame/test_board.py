@@ -0,0 +1,208 @@
+import pickle
+import random
+
+from diplomacy import Game
+
+from dgame.board.adjudicator import resolve_movement
+from dgame.board.board import Board
+from dgame.board.unit import get_all_possible_move_orders, get_all_possible_retreat_orders, make_unit
+from dgame.executor import parse_order
+from dgame.order import MOVE, build, move
+from dgame.power import Player
+
+
+def check_placement(board):
+    """ every unit stands where the placement arrays say it does """
+    state = board.state
+
+    for pid, unit in enumerate(state.units):
+        if unit is not None:
+            assert unit.loc.without_coast.id == pid, '{} is on {}'.format(unit, board.get_tile_by_id(pid))
+            assert state.coast[pid] == unit.loc.id
+
+
+def test_fork_inside_rolled_back_transaction(board):
+    """ undoing a move must not move the unit shared with a fork taken after the move """
+    france = board.get_player('FRANCE')
+    par = board.get_tile_by_name('PAR')
+    bur = board.get_tile_by_name('BUR')
+
+    with board.transaction(rollback=True):
+        board.process_order(france, move(board.get_unit_at(par), bur))
+        fork = board.fork()
+
+    check_placement(board)
+    check_placement(fork)
+    assert board.get_unit_at(par) is not None and board.get_unit_at(bur) is None
+    assert fork.get_unit_at(bur) is not None and fork.get_unit_at(par) is None
+    assert 'A BUR' in {str(unit) for unit in fork.units_of(france)}
+
+
+def test_random_moves_forks_and_undo(board):
+    rng = random.Random(0)
+    forks = []
+
+    for step in range(300):
+        units = board.state.units
+        moves = [
+            order for orders in get_all_possible_move_orders(board).values() for order in orders
+            if order.order is MOVE and units[order.dest.without_coast.id] is None
+        ]
+        order = rng.choice(sorted(moves, key=str))
+
+        with board.transaction(rollback=step % 2 == 0):
+            board.process_orders({order.unit.owner: [order]})
+
+            if step % 3 == 0:
+                forks.append(board.fork())
+
+        check_placement(board)
+
+    for fork in forks:
+        check_placement(fork)
+
+
+def test_fork_inside_rolled_back_swap(board):
+    russia = board.get_player('RUSSIA')
+    mos = board.get_tile_by_name('MOS')
+    war = board.get_tile_by_name('WAR')
+
+    with board.transaction(rollback=True):
+        board.process_orders({russia: [move(board.get_unit_at(mos), war), move(board.get_unit_at(war), mos)]})
+        fork = board.fork()
+
+    check_placement(board)
+    check_placement(fork)
+
+
+def retreat_game():
+    """ BUR and TYR are dislodged, PIC is left empty by a standoff """
+    game = Game()
+    game.clear_units()
+    game.set_units('FRANCE', ['A BUR', 'A BRE'])
+    game.set_units('GERMANY', ['A MUN', 'A RUH', 'A BEL'])
+    game.set_units('ITALY', ['A VEN', 'A TRI'])
+    game.set_units('AUSTRIA', ['A TYR'])
+
+    game.set_orders('FRANCE', ['A BRE - PIC', 'A BUR H'])
+    game.set_orders('GERMANY', ['A MUN - BUR', 'A RUH S A MUN - BUR', 'A BEL - PIC'])
+    game.set_orders('ITALY', ['A VEN - TYR', 'A TRI S A VEN - TYR'])
+    game.set_orders('AUSTRIA', ['A TYR H'])
+    game.process()
+    return game
+
+
+def test_retreat_to_the_province_of_another_attacker(make_board):
+    """ MUN is the origin of the attack on BUR but TYR can retreat there """
+    game = retreat_game()
+    board = make_board()
+    board.from_game_state(game)
+
+    expected = set(game.get_all_possible_orders()['TYR']) | set(game.get_all_possible_orders()['BUR'])
+    orders = {str(order) for orders in get_all_possible_retreat_orders(board).values() for order in orders}
+
+    assert 'A TYR R MUN' in orders
+    assert orders == expected
+
+
+def positions(board):
+    """ units and dislodged units by power name """
+    names = {id(player): name for name, player in board.players().items()}
+    units = {name: {str(unit) for unit in board.units_of(player)} for name, player in board.players().items()}
+    dislodged = {pid: (str(unit), names[id(unit.owner)], attacker) for pid, (unit, attacker) in board.dislodged.items()}
+    return units, dislodged
+
+
+def check_round_trip(board, decoded):
+    assert not board.diff(decoded)
+    assert str(decoded.phase) == str(board.phase)
+    assert positions(decoded) == positions(board)
+    assert decoded.contested == board.contested
+    check_placement(decoded)
+
+
+def test_bytes_round_trip(board, make_board, standard_definition):
+    retreats = make_board()
+    retreats.from_game_state(retreat_game())
+    assert retreats.dislodged and retreats.contested
+
+    for position in (board, retreats):
+        data = position.to_bytes()
+        check_round_trip(position, Board.from_bytes(position.map_index, data))
+        assert Board.from_bytes(position.map_index, data).to_bytes() == data
+
+        # owners are matched by name
+        players = [Player(p) for p in reversed(standard_definition.initial_condition())]
+        check_round_trip(position, Board.from_bytes(position.map_index, data, players))
+
+        check_round_trip(position, pickle.loads(pickle.dumps(position)))
+
+
+def board_orders(board, orders):
+    """ legacy orders of a phase to board orders; builds are of units not on the board yet """
+    parsed = []
+
+    for order in orders:
+        if order.endswith(' B'):
+            parsed.append(build(make_unit(*board.map_index.units[order[:-2]])))
+        elif order != 'WAIVE':
+            parsed.append(parse_order(order, board))
+
+    return parsed
+
+
+def check_phase(board, game):
+    assert str(board.phase) == game.get_current_phase()
+
+    for name, power in game.powers.items():
+        player = board.get_player(name)
+        assert {str(unit) for unit in board.units_of(player)} == set(power.units), name
+        assert {str(center) for center in board.centers_of(player)} == set(power.centers), name
+        assert board.build_balance(player) == len(power.centers) - len(power.units), name
+
+
+def test_phases_of_random_games(make_board):
+    """ phases, supply centers and build balance follow `Game.process` when the board plays its own orders """
+    phases = set()
+
+    # games with retreat phases
+    for seed in (2, 5, 6):
+        rng = random.Random(seed)
+        game = Game()
+        board = make_board()
+        board.from_game_state(game)
+
+        while not game.is_game_done and int(game.get_current_phase()[1:5]) < 1907:
+            phase = game.get_current_phase()
+            possible = game.get_all_possible_orders()
+            orders = {}
+
+            for name, power in game.powers.items():
+                locs = sorted(loc for loc in game.get_orderable_locations(name) if possible[loc])
+
+                # as many builds or disbands as the balance allows, the legacy engine ignores or adds the others
+                if phase[-1] == 'A':
+                    locs = rng.sample(locs, min(abs(len(power.centers) - len(power.units)), len(locs)))
+
+                orders[board.get_player(name)] = [rng.choice(sorted(possible[loc])) for loc in locs]
+                game.set_orders(name, orders[board.get_player(name)])
+
+            orders = {player: board_orders(board, power_orders) for player, power_orders in orders.items()}
+            if phase[-1] == 'M':
+                board.apply_resolution(resolve_movement(board, orders))
+            else:
+                board.process_orders(orders)
+
+            game.process()
+
+            before = board.fork()
+            with board.transaction(rollback=True):
+                board.advance_phase()
+
+            assert str(board.phase) == phase and not board.diff(before), (seed, phase)
+            assert board.dislodged == before.dislodged and board.contested == before.contested, (seed, phase)
+            board.advance_phase()
+            check_phase(board, game)
+            phases.add(phase[-1])
+
+    assert phases == {'M', 'R', 'A'}
@@ -0,0 +1,26 @@
+import gc
+
+from dgame.board import map_index
+from dgame.board.definition import BoardDefinitionFile
+from dgame.board.map_index import get_map_index, load_map_index
+from dgame.conftest import STANDARD_MAP
+
+
+def test_same_file_same_index(standard_definition):
+    index = get_map_index(standard_definition)
+
+    assert get_map_index(BoardDefinitionFile(STANDARD_MAP)) is index
+    assert load_map_index(STANDARD_MAP) is index
+
+
+def test_dropped_definitions_are_not_kept(standard_definition):
+    get_map_index(standard_definition)
+    indexes = len(map_index._indexes)
+    keys = len(map_index._keys)
+
+    for _ in range(3):
+        get_map_index(BoardDefinitionFile(STANDARD_MAP))
+
+    gc.collect()
+    assert len(map_index._indexes) == indexes
+    assert len(map_index._keys) == keys
@@ -0,0 +1,66 @@
+from diplomacy import Game
+
+from dgame.board.unit import get_all_possible_move_orders, get_all_possible_retreat_orders, make_unit, ARMY, FLEET
+from dgame.board.vectorized import get_all_possible_move_order_codes
+from dgame.order import build, decode, disband, encode, encode_orders, waive
+
+
+def round_trip(board, order):
+    decoded = decode(encode(order), board)
+    assert str(decoded) == str(order)
+    assert decoded.order is order.order and decoded.dest is order.dest
+    return decoded
+
+
+def test_move_orders_round_trip(board):
+    for orders in get_all_possible_move_orders(board).values():
+        for order in orders:
+            decoded = round_trip(board, order)
+            assert decoded.unit is order.unit and decoded.target is order.target
+
+
+def test_retreat_orders_use_the_dislodged_units(make_board):
+    """ the attacker now stands on BUR, retreats and disbands are about the dislodged army """
+    game = Game()
+    game.clear_units()
+    game.set_units('FRANCE', ['A BUR'])
+    game.set_units('GERMANY', ['A MUN', 'A RUH'])
+    game.set_orders('FRANCE', ['A BUR H'])
+    game.set_orders('GERMANY', ['A MUN - BUR', 'A RUH S A MUN - BUR'])
+    game.process()
+
+    board = make_board()
+    board.from_game_state(game)
+    bur = board.get_tile_by_name('BUR')
+    dislodged = board.get_dislodged_at(bur)
+
+    assert dislodged is not None and board.get_unit_at(bur).owner is not dislodged.owner
+
+    orders = [order for orders in get_all_possible_retreat_orders(board).values() for order in orders]
+    assert orders
+
+    for order in orders + [disband(dislodged)]:
+        assert round_trip(board, order).unit is dislodged
+
+
+def test_builds_and_waive_round_trip(make_board):
+    board = make_board()
+    board.load_units({'RUSSIA': ['A MOS']})
+
+    for unit in (make_unit(ARMY, board.get_tile_by_name('WAR')), make_unit(FLEET, board.get_tile_by_name('STP/SC'))):
+        decoded = round_trip(board, build(unit))
+        assert decoded.unit.loc is unit.loc and decoded.unit.unit_type == unit.unit_type
+        assert board.get_unit_at(unit.loc) is None
+
+    assert round_trip(board, waive()).unit is None
+
+
+def test_packed_codes(board, make_board):
+    convoys = make_board()
+    convoys.load_units({'ENGLAND': ['A LON', 'F NTH', 'F ENG', 'A WAL'], 'FRANCE': ['A BEL', 'F MAO', 'A BRE']})
+
+    for position in (board, convoys):
+        orders = [order for orders in get_all_possible_move_orders(position).values() for order in orders]
+        packed = get_all_possible_move_order_codes(position, packed=True)
+
+        assert set(packed.tolist()) == set(encode_orders(orders))
@@ -0,0 +1,168 @@
+import random
+
+from diplomacy import Game
+
+from dgame.board.order_generator import OrderGenerator
+from dgame.board.unit import get_all_possible_move_orders, get_possible_move_orders_for_power, iter_possible_orders
+from dgame.board.unit import get_all_possible_retreat_orders, get_possible_orders_at, make_unit
+from dgame.board.vectorized import decode_orders, get_all_possible_move_order_codes
+from dgame.order import build, disband, HOLD, MOVE
+
+
+def as_strings(orders):
+    return {loc.short: set(map(str, unit_orders)) for loc, unit_orders in orders.items()}
+
+
+def check(board, generator):
+    # forks start with an empty cache so this is a full recompute
+    expected = as_strings(get_all_possible_move_orders(board.fork()))
+    assert as_strings(generator.possible_orders()) == expected
+
+
+def sync_units(board, game):
+    """ disband and build units one by one until the board has the units of the game engine """
+    table = board.map_index.units
+
+    for name, power in game.powers.items():
+        player = board.get_player(name)
+        wanted = set(power.units)
+
+        for unit in board.units_of(player):
+            if str(unit) not in wanted:
+                board.process_order(player, disband(unit))
+
+        owned = {str(unit) for unit in board.units_of(player)}
+        for unit_name in wanted - owned:
+            unit_type, loc = table[unit_name]
+            board.process_order(player, build(make_unit(unit_type, loc)))
+
+
+def saved_phases(json_game):
+    """ replay a saved game with the legacy engine, yield the game before every phase is processed """
+    game = Game(map_name=json_game.get('map', 'standard'), rules=json_game.get('rules', []))
+
+    for phase in json_game['phases']:
+        yield game
+
+        for power_name, power_orders in phase['orders'].items():
+            if not power_orders:
+                continue
+
+            if phase['name'][-1] == 'R':
+                power_orders = [order.replace(' - ', ' R ') for order in power_orders]
+
+            power_orders = [order for order in power_orders if order != 'WAIVE']
+            game.set_orders(power_name, power_orders, expand=False)
+
+        game.process()
+
+
+def saved_positions(saved_games, board, kind='M'):
+    """ board of every phase of the saved games of a kind; movement 'M' or retreats 'R' """
+    for json_game in saved_games:
+        for game in saved_phases(json_game):
+            if game.get_current_phase()[-1] == kind:
+                board.from_game_state(game)
+                yield board
+
+
+def replay(json_game, board):
+    generator = None
+
+    for game in saved_phases(json_game):
+        if generator is None:
+            board.from_game_state(game)
+            generator = OrderGenerator(board)
+
+        if game.get_current_phase()[-1] == 'M':
+            sync_units(board, game)
+            check(board, generator)
+
+    generator.close()
+
+
+def test_replays(make_board, saved_games):
+    """ incremental orders are the same as a full recompute on every movement phase of the saved games """
+    for json_game in saved_games:
+        replay(json_game, make_board())
+
+
+def test_vectorized_replays(make_board, saved_games):
+    """ the order rows decode to the orders of the object engine """
+    for board in saved_positions(saved_games, make_board()):
+        codes = get_all_possible_move_order_codes(board)
+        assert as_strings(decode_orders(board, codes)) == as_strings(get_all_possible_move_orders(board.fork()))
+
+
+def test_orders_of_each_power(make_board, saved_games):
+    """ the orders of the units of a power are the same as with a full recompute """
+    for board in saved_positions(saved_games, make_board()):
+        expected = as_strings(get_all_possible_move_orders(board.fork()))
+
+        for player in board.players().values():
+            owned = {unit.loc.without_coast.short for unit in board.units_of(player)}
+            assert as_strings(get_possible_move_orders_for_power(board.fork(), player)) == \
+                {loc: orders for loc, orders in expected.items() if loc in owned}
+
+
+def test_lazy_orders(make_board, saved_games):
+    """ `iter_possible_orders` of the units of a power, optionally limited to some order types """
+    for board in saved_positions(saved_games, make_board()):
+        expected = [order for orders in get_all_possible_move_orders(board.fork()).values() for order in orders]
+
+        for player in board.players().values():
+            locs = [unit.loc for unit in board.units_of(player)]
+            orders = {str(order) for order in expected if order.unit.owner is player}
+
+            assert {str(order) for order in iter_possible_orders(board.fork(), locs)} == orders
+
+        assert {str(order) for order in iter_possible_orders(board.fork(), kinds={HOLD, MOVE})} == \
+            {str(order) for order in expected if order.order in (HOLD, MOVE)}
+
+
+def test_orders_of_each_province(make_board, saved_games):
+    """ `get_possible_orders_at` is the entry of the province in a full recompute """
+    for board in saved_positions(saved_games, make_board()):
+        expected = as_strings(get_all_possible_move_orders(board.fork()))
+
+        for province in board.map_index.provinces:
+            if province.without_coast is province:
+                orders = {str(order) for order in get_possible_orders_at(board, province)}
+                assert orders == expected.get(province.short, set()), province
+
+
+def test_retreat_orders_of_each_province(make_board, saved_games):
+    retreats = 0
+
+    for board in saved_positions(saved_games, make_board(), 'R'):
+        expected = as_strings(get_all_possible_retreat_orders(board))
+        retreats += 1
+
+        for province in board.map_index.provinces:
+            if province.without_coast is province:
+                orders = {str(order) for order in get_possible_orders_at(board, province)}
+                assert orders == expected.get(province.short, set()), province
+
+    assert retreats
+
+
+def test_moves_and_undo(board):
+    """ random moves to empty provinces, some of them reverted """
+    rng = random.Random(0)
+    generator = OrderGenerator(board)
+    units = board.state.units
+
+    for step in range(200):
+        moves = [
+            order for orders in generator.possible_orders().values() for order in orders
+            if order.order is MOVE and units[order.dest.without_coast.id] is None
+        ]
+        order = rng.choice(sorted(moves, key=str))
+
+        with board.transaction(rollback=step % 3 == 0):
+            board.process_orders({order.unit.owner: [order]})
+            check(board, generator)
+
+        check(board, generator)
+
+    generator.close()
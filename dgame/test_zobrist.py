@@ -0,0 +1,39 @@
+from dgame.board.board import Board
+from dgame.board.zobrist import TranspositionTable
+from dgame.order import move
+
+
+def test_hash_of_the_placement(board):
+    start = board.zobrist_hash
+    russia = board.get_player('RUSSIA')
+    mos = board.get_tile_by_name('MOS')
+    war = board.get_tile_by_name('WAR')
+    ukr = board.get_tile_by_name('UKR')
+
+    with board.transaction(rollback=True):
+        board.process_orders({russia: [move(board.get_unit_at(mos), ukr)]})
+        moved = board.zobrist_hash
+        assert moved != start
+        assert board.fork().zobrist_hash == moved
+
+    assert board.zobrist_hash == start
+    assert board.fork().zobrist_hash == start
+    assert Board.from_bytes(board.map_index, board.to_bytes()).zobrist_hash == start
+
+    # same placement once the two armies swapped
+    board.process_orders({russia: [move(board.get_unit_at(mos), war), move(board.get_unit_at(war), mos)]})
+    assert board.zobrist_hash == start
+
+
+def test_transposition_table_evicts_the_least_recently_used():
+    table = TranspositionTable(2)
+    table.put(1, 'a')
+    table.put(2, 'b')
+
+    assert table.get(1) == 'a'
+    table.put(3, 'c')
+
+    assert table.get(2) is None
+    assert table.get(1) == 'a' and table.get(3) == 'c'
+    assert len(table) == 2 and 2 not in table
+    assert (table.hits, table.misses) == (3, 1)